@@ -0,0 +1,4 @@
+"""
+基准测试
+用法见 docs/benchmark.md
+"""
@@ -0,0 +1,224 @@
+"""
+基准测试数据生成器
+按随机种子确定性地生成目录树、文件名以及 words.txt / regex_rules.txt 规则集
+"""
+
+import os
+import random
+from typing import List
+
+
+# 文件名分布
+NAME_DISTRIBUTIONS = ("photos", "episodes", "documents", "repeated", "mixed")
+
+# 文件大小分布
+SIZE_DISTRIBUTIONS = ("empty", "small", "mixed")
+
+_WORDS = (
+    "report", "daily", "photo", "document", "test", "old", "draft", "final",
+    "meeting", "notes", "project", "summary", "invoice", "backup", "scan",
+    "holiday", "family", "archive", "export", "version", "copy", "image",
+)
+
+_EXTENSIONS = (".jpg", ".png", ".txt", ".pdf", ".docx", ".mp4", ".mkv", ".zip")
+
+# 大量目录中反复出现的文件名
+_REPEATED = ("cover", "index", "folder", "thumb", "IMG_0001", "readme", "desktop")
+
+
+def _word(rng: random.Random) -> str:
+    word = rng.choice(_WORDS)
+    style = rng.random()
+    if style < 0.2:
+        return word.upper()
+    if style < 0.4:
+        return word.capitalize()
+    return word
+
+
+def generate_name(rng: random.Random, distribution: str = "mixed") -> str:
+    """
+    生成一个文件名（含扩展名）
+
+    Args:
+        rng: 随机数生成器
+        distribution: 文件名分布，见 NAME_DISTRIBUTIONS
+    """
+    if distribution == "mixed":
+        distribution = rng.choice(NAME_DISTRIBUTIONS[:-1])
+
+    if distribution == "photos":
+        date = f"{rng.randint(2015, 2025)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+        stem = f"IMG_{date}_{rng.randint(0, 9999):04d}"
+        return stem + rng.choice((".jpg", ".png"))
+
+    if distribution == "episodes":
+        stem = f"{_word(rng).capitalize()} {_word(rng)} - {rng.randint(1, 200)}"
+        if rng.random() < 0.3:
+            stem += f"_v{rng.randint(1, 5)}"
+        return stem + rng.choice((".mp4", ".mkv"))
+
+    if distribution == "documents":
+        separator = rng.choice(("_", "-", " ", "."))
+        parts = [_word(rng) for _ in range(rng.randint(1, 4))]
+        if rng.random() < 0.4:
+            year, month, day = rng.randint(2015, 2025), rng.randint(1, 12), rng.randint(1, 28)
+            parts.append(f"{year}-{month:02d}-{day:02d}")
+        return separator.join(parts) + rng.choice(_EXTENSIONS)
+
+    if distribution == "repeated":
+        return rng.choice(_REPEATED) + rng.choice((".jpg", ".txt", ".ini"))
+
+    raise ValueError(f"未知的文件名分布: {distribution}")
+
+
+def generate_names(count: int, distribution: str = "mixed", seed: int = 0) -> List[str]:
+    """
+    生成一批文件名（不含扩展名），用于只测规则计算的场景
+
+    Args:
+        count: 数量
+        distribution: 文件名分布
+        seed: 随机种子
+    """
+    rng = random.Random(seed)
+    return [os.path.splitext(generate_name(rng, distribution))[0] for _ in range(count)]
+
+
+def _file_size(rng: random.Random, distribution: str) -> int:
+    if distribution == "empty":
+        return 0
+    if distribution == "small":
+        return rng.randint(0, 4096)
+    if distribution == "mixed":
+        # 大部分是小文件，少量几 MB 的大文件
+        return min(int(rng.lognormvariate(8, 2.5)), 8 * 1024 * 1024)
+    if distribution.isdigit():
+        return int(distribution)
+    raise ValueError(f"未知的文件大小分布: {distribution}")
+
+
+def generate_tree(
+    root: str,
+    depth: int = 3,
+    fanout: int = 4,
+    files_per_dir: int = 20,
+    name_distribution: str = "mixed",
+    size_distribution: str = "small",
+    seed: int = 0,
+) -> int:
+    """
+    生成一棵目录树
+
+    Args:
+        root: 根目录（不存在时创建）
+        depth: 目录深度，0 表示只有根目录
+        fanout: 每个目录的子目录数
+        files_per_dir: 每个目录的文件数
+        name_distribution: 文件名分布，见 NAME_DISTRIBUTIONS
+        size_distribution: 文件大小分布，见 SIZE_DISTRIBUTIONS，或直接给出字节数
+        seed: 随机种子，相同参数和种子生成的目录树完全相同
+
+    Returns:
+        生成的文件数
+    """
+    rng = random.Random(seed)
+    # 文件内容用固定的块拼接，生成速度不受随机数影响
+    block = random.Random(seed).randbytes(64 * 1024)
+    count = 0
+
+    stack = [(root, 0)]
+    while stack:
+        dir_path, level = stack.pop()
+        os.makedirs(dir_path, exist_ok=True)
+
+        for _ in range(files_per_dir):
+            name = generate_name(rng, name_distribution)
+            size = _file_size(rng, size_distribution)
+            path = os.path.join(dir_path, name)
+            # 同一目录内重名时直接覆盖，文件数可能略少于 files_per_dir
+            with open(path, "wb") as f:
+                remaining = size
+                while remaining > 0:
+                    chunk = block[: min(remaining, len(block))]
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            count += 1
+
+        if level < depth:
+            for index in range(fanout):
+                sub_dir = os.path.join(dir_path, f"{_word(rng)}_{level}_{index}")
+                stack.append((sub_dir, level + 1))
+
+    return count
+
+
+def generate_words(path: str, count: int, seed: int = 0) -> None:
+    """
+    生成 words.txt，包含生成器用到的真实词汇和大量不会命中的随机词
+
+    Args:
+        path: 文件路径
+        count: 规则条数
+        seed: 随机种子
+    """
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    seen = set()
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# 基准测试生成的替换规则\n")
+        for word in _WORDS[: min(count, len(_WORDS))]:
+            f.write(f"{word}：{word[:3]}\n")
+            seen.add(word)
+
+        while len(seen) < count:
+            word = "".join(rng.choice(alphabet) for _ in range(rng.randint(4, 10)))
+            if word in seen:
+                continue
+            seen.add(word)
+            f.write(f"{word}：{word.upper()}\n")
+
+
+# 正则规则模板：(模式, 替换内容)
+_REGEX_TEMPLATES = (
+    (r"_v\d+", ""),
+    (r"(\d{4})-(\d{2})-(\d{2})", "$1$2$3"),
+    (r"\s+", "_"),
+    (r"IMG_(\d{4})(\d{2})(\d{2})_(\d+)", "$1-$2-$3_$4"),
+    (r"^(.+)$", "$1"),
+    (r"\.+", "_"),
+)
+
+
+def generate_regex_rules(path: str, count: int, seed: int = 0, interactive: bool = False) -> None:
+    """
+    生成 regex_rules.txt
+
+    Args:
+        path: 文件路径
+        count: 规则条数
+        seed: 随机种子
+        interactive: 是否在开头加入一条提取数字规则（需要配置参数）
+    """
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# 基准测试生成的正则规则\n")
+        written = 0
+        if interactive:
+            f.write(r"\s-\s(\d+)" + " ==> {number}\n")
+            written += 1
+
+        for pattern, replacement in _REGEX_TEMPLATES:
+            if written >= count:
+                break
+            f.write(f"{pattern} ==> {replacement}\n")
+            written += 1
+
+        # 其余规则带有不会命中的字面量，模拟大型规则集中的“冷门”规则
+        while written < count:
+            literal = "".join(rng.choice(alphabet) for _ in range(rng.randint(3, 8)))
+            f.write(f"{literal}_(\\d+) ==> {literal.upper()}$1\n")
+            written += 1
@@ -0,0 +1,434 @@
+"""
+基准测试入口
+
+在仓库根目录运行：
+    python -m benchmarks.run [--scale small|medium|large] [--output results.json] [--compare old.json]
+
+所有场景使用确定性的合成数据，结果可在不同提交之间对比
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from main import FileRenamer, PLAN_BATCH_SIZE
+from modules.copier import FileCopier, available_backends
+from modules.loader import RuleLoader
+from modules.walker import scan_tree
+
+from .generate import generate_names, generate_regex_rules, generate_tree, generate_words
+
+
+# 规模预设
+SCALES = {
+    "small": {
+        "names": 5000,
+        "word_counts": (100, 1000),
+        "regex_counts": (10, 50),
+        "tree": {"depth": 2, "fanout": 4, "files_per_dir": 40},
+        "large_files": (2, 32),
+    },
+    "medium": {
+        "names": 50000,
+        "word_counts": (100, 1000, 20000),
+        "regex_counts": (10, 100),
+        "tree": {"depth": 3, "fanout": 5, "files_per_dir": 60},
+        "large_files": (4, 128),
+    },
+    "large": {
+        "names": 200000,
+        "word_counts": (100, 1000, 20000),
+        "regex_counts": (10, 100, 500),
+        "tree": {"depth": 4, "fanout": 5, "files_per_dir": 80},
+        "large_files": (4, 512),
+    },
+}
+
+# 对比时超过该比例视为变慢
+REGRESSION_THRESHOLD = 0.10
+
+
+def _quiet(func, *args, **kwargs):
+    """调用函数并丢弃其控制台输出（加载器会打印加载条数）"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def _best_of(repeat, func, setup=None):
+    """
+    重复运行取最短耗时
+
+    Args:
+        repeat: 重复次数
+        func: 被计时的函数，返回处理的条目数
+        setup: 每次计时前调用的准备函数（不计入耗时）
+    """
+    best = None
+    items = 0
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        items = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, items
+
+
+def _load_rules(rules_dir, kind):
+    """从生成的规则文件加载规则，交互式规则使用固定参数"""
+    loader = RuleLoader(rules_dir)
+    if kind == "words":
+        return _quiet(loader.load_simple_rules)
+
+    rules = _quiet(loader.load_regex_rules, interactive=False, use_cache=False)
+    for rule in rules:
+        if rule.rule_type == "extract_number":
+            rule.metadata["digits"] = 3
+        elif rule.rule_type == "extract_text":
+            rule.metadata.update(uppercase=False, lowercase=False)
+    return rules
+
+
+def bench_rules(work_dir, kind, count, names, cache, batch, repeat):
+    """只测规则计算：对一批文件名逐个调用 apply_rules，或按批调用 apply_rules_batch"""
+    rules_dir = os.path.join(work_dir, f"rules_{kind}_{count}")
+    os.makedirs(rules_dir, exist_ok=True)
+    if kind == "words":
+        generate_words(os.path.join(rules_dir, "words.txt"), count)
+    else:
+        generate_regex_rules(os.path.join(rules_dir, "regex_rules.txt"), count, interactive=True)
+    rules = _load_rules(rules_dir, kind)
+
+    renamer = None
+
+    def setup():
+        # 每轮使用新的实例，缓存从空开始
+        nonlocal renamer
+        renamer = FileRenamer(cache_size=65536 if cache else 0)
+        renamer.set_rules(rules)
+
+    def run():
+        if batch:
+            for start in range(0, len(names), PLAN_BATCH_SIZE):
+                renamer.apply_rules_batch(names[start : start + PLAN_BATCH_SIZE])
+        else:
+            apply_rules = renamer.apply_rules
+            for name in names:
+                apply_rules(name)
+        return len(names)
+
+    return _best_of(repeat, run, setup)
+
+
+def bench_load(work_dir, count, use_cache, repeat):
+    """只测加载正则规则：重新解析（含检查）或读取规则缓存"""
+    rules_dir = os.path.join(work_dir, f"rules_load_{count}")
+    os.makedirs(rules_dir, exist_ok=True)
+    generate_regex_rules(os.path.join(rules_dir, "regex_rules.txt"), count)
+    loader = RuleLoader(rules_dir)
+    if use_cache:
+        # 预先写好缓存
+        _quiet(loader.load_regex_rules, interactive=False, refresh=True)
+
+    def run():
+        rules = _quiet(loader.load_regex_rules, interactive=False, use_cache=use_cache)
+        return len(rules)
+
+    return _best_of(repeat, run)
+
+
+def bench_walk(tree_dir, repeat):
+    """只测遍历"""
+
+    def run():
+        return sum(1 for _ in scan_tree(tree_dir))
+
+    return _best_of(repeat, run)
+
+
+def _tree_renamer(tree_rules, memory_budget=None):
+    renamer = FileRenamer(memory_budget=memory_budget)
+    renamer.set_rules(tree_rules)
+    return renamer
+
+
+def bench_plan(tree_dir, work_dir, tree_rules, processes, repeat, memory_budget=None):
+    """遍历 + 规则 + 冲突处理，写出计划文件；memory_budget=0 时冲突检测全部走磁盘"""
+    plan_path = os.path.join(work_dir, "plan.jsonl")
+    output_dir = os.path.join(work_dir, "plan_output")
+
+    def run():
+        renamer = _tree_renamer(tree_rules, memory_budget)
+        report = renamer.plan(tree_dir, True, output_dir, plan_path, processes=processes)
+        return report["total"]
+
+    return _best_of(repeat, run)
+
+
+def bench_process(tree_dir, work_dir, tree_rules, workers, output_mode, repeat):
+    """端到端：遍历、规划并生成输出文件"""
+    output_dir = os.path.join(work_dir, f"output_{output_mode}_{workers}")
+
+    def setup():
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    def run():
+        renamer = _tree_renamer(tree_rules)
+        renamer.process_files(tree_dir, True, output_dir, workers=workers, output_mode=output_mode)
+        return renamer.stats["total"]
+
+    result = _best_of(repeat, run, setup)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    return result
+
+
+def bench_copy(large_dir, work_dir, backend, repeat):
+    """只测复制大文件，items 为复制的 MB 数"""
+    output_dir = os.path.join(work_dir, f"copy_{backend}")
+    copier = FileCopier(backend)
+    sources = sorted(os.listdir(large_dir))
+
+    def setup():
+        shutil.rmtree(output_dir, ignore_errors=True)
+        os.makedirs(output_dir)
+
+    def run():
+        total = 0
+        for name in sources:
+            source = os.path.join(large_dir, name)
+            copier.copy(source, os.path.join(output_dir, name))
+            total += os.path.getsize(source)
+        return total // (1024 * 1024)
+
+    result = _best_of(repeat, run, setup)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    return result
+
+
+def run_benchmarks(scale, repeat, work_dir, only=None):
+    """
+    运行所有场景
+
+    Args:
+        scale: 规模预设名
+        repeat: 每个场景重复次数
+        work_dir: 存放生成数据的临时目录
+        only: 只运行名称包含该字符串的场景
+
+    Returns:
+        结果列表
+    """
+    config = SCALES[scale]
+    results = []
+
+    def record(scenario, params, measured):
+        seconds, items = measured
+        result = {
+            "scenario": scenario,
+            "params": params,
+            "seconds": round(seconds, 6),
+            "items": items,
+            "items_per_sec": round(items / seconds, 1) if seconds > 0 else None,
+        }
+        results.append(result)
+        print(_format_row(result), flush=True)
+
+    def wanted(scenario):
+        return only is None or only in scenario
+
+    names = generate_names(config["names"])
+
+    for kind, counts in (("words", config["word_counts"]), ("regex", config["regex_counts"])):
+        for count in counts:
+            for variant, cache, batch in (
+                ("nocache", False, False),
+                ("cache", True, False),
+                ("batch", False, True),
+            ):
+                scenario = f"rules/{kind}/{count}/{variant}"
+                if wanted(scenario):
+                    params = {
+                        "kind": kind,
+                        "rules": count,
+                        "names": len(names),
+                        "cache": cache,
+                        "batch": batch,
+                    }
+                    measured = bench_rules(work_dir, kind, count, names, cache, batch, repeat)
+                    record(scenario, params, measured)
+
+    # 大文件复制，对比各复制后端
+    copy_backends = [name for name in available_backends() if name != "auto"]
+    if any(wanted(f"copy/large/{name}") for name in copy_backends):
+        count, size_mb = config["large_files"]
+        large_dir = os.path.join(work_dir, "large")
+        generate_tree(
+            large_dir, depth=0, fanout=0, files_per_dir=count,
+            size_distribution=str(size_mb * 1024 * 1024),
+        )
+        for name in copy_backends:
+            scenario = f"copy/large/{name}"
+            if wanted(scenario):
+                params = {"backend": name, "files": count, "size_mb": size_mb}
+                record(scenario, params, bench_copy(large_dir, work_dir, name, repeat))
+
+    # 启动时加载正则规则
+    for count in config["regex_counts"]:
+        for variant, use_cache in (("parse", False), ("cache", True)):
+            scenario = f"load/regex/{count}/{variant}"
+            if wanted(scenario):
+                params = {"rules": count, "cache": use_cache}
+                record(scenario, params, bench_load(work_dir, count, use_cache, repeat))
+
+    tree_scenarios = (
+        "walk",
+        "plan",
+        "plan/spill",
+        "plan/regex/1",
+        "plan/regex/processes",
+        "process/copy/1",
+        "process/copy/4",
+        "process/hardlink/4",
+    )
+    if not any(wanted(scenario) for scenario in tree_scenarios):
+        return results
+
+    tree_dir = os.path.join(work_dir, "tree")
+    files = generate_tree(tree_dir, **config["tree"])
+    tree_params = dict(config["tree"], files=files)
+    rules_dir = os.path.join(work_dir, "rules_tree")
+    os.makedirs(rules_dir, exist_ok=True)
+    generate_words(os.path.join(rules_dir, "words.txt"), 100)
+    tree_rules = _load_rules(rules_dir, "words")
+
+    if wanted("walk"):
+        record("walk", tree_params, bench_walk(tree_dir, repeat))
+    if wanted("plan"):
+        record("plan", tree_params, bench_plan(tree_dir, work_dir, tree_rules, 1, repeat))
+    if wanted("plan/spill"):
+        measured = bench_plan(tree_dir, work_dir, tree_rules, 1, repeat, memory_budget=0)
+        record("plan/spill", dict(tree_params, memory_budget=0), measured)
+
+    # 大量正则规则时，规则计算分发到多个进程
+    if any(wanted(f"plan/regex/{n}") for n in ("1", "processes")):
+        regex_dir = os.path.join(work_dir, "rules_tree_regex")
+        os.makedirs(regex_dir, exist_ok=True)
+        generate_regex_rules(
+            os.path.join(regex_dir, "regex_rules.txt"), max(config["regex_counts"])
+        )
+        regex_rules = _load_rules(regex_dir, "regex")
+        processes = os.cpu_count() or 1
+        for count in sorted({1, processes}):
+            scenario = f"plan/regex/{count if count == 1 else 'processes'}"
+            if wanted(scenario):
+                params = dict(tree_params, rules=len(regex_rules), processes=count)
+                measured = bench_plan(tree_dir, work_dir, regex_rules, count, repeat)
+                record(scenario, params, measured)
+    for output_mode, workers in (("copy", 1), ("copy", 4), ("hardlink", 4)):
+        scenario = f"process/{output_mode}/{workers}"
+        if wanted(scenario):
+            params = dict(tree_params, workers=workers, output_mode=output_mode)
+            measured = bench_process(tree_dir, work_dir, tree_rules, workers, output_mode, repeat)
+            record(scenario, params, measured)
+
+    return results
+
+
+def _format_row(result):
+    rate = result["items_per_sec"]
+    rate_text = f"{rate:>14,.0f}/s" if rate is not None else f"{'-':>16}"
+    return f"{result['scenario']:<32} {result['seconds']:>10.4f}s {result['items']:>9} {rate_text}"
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path, results):
+    """
+    与之前保存的结果对比，打印耗时变化
+
+    Returns:
+        变慢超过阈值的场景数
+    """
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = {item["scenario"]: item for item in json.load(f)["results"]}
+
+    print(f"\n与 {old_path} 对比（负数表示变快）")
+    regressions = 0
+    for result in results:
+        before = old.get(result["scenario"])
+        if before is None or not before["seconds"]:
+            continue
+        change = (result["seconds"] - before["seconds"]) / before["seconds"]
+        mark = ""
+        if change > REGRESSION_THRESHOLD:
+            mark = "  <-- 变慢"
+            regressions += 1
+        print(f"{result['scenario']:<32} {before['seconds']:>10.4f}s -> "
+              f"{result['seconds']:>10.4f}s {change:>+8.1%}{mark}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ReNameFile 基准测试")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="数据规模")
+    parser.add_argument("--repeat", type=int, default=3, help="每个场景重复次数，取最短耗时")
+    parser.add_argument("--only", help="只运行名称包含该字符串的场景，如 rules/words")
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    parser.add_argument("--compare", help="与之前保存的 JSON 结果对比")
+    parser.add_argument("--keep", help="在指定目录生成数据并保留，默认使用临时目录")
+    args = parser.parse_args(argv)
+
+    print(f"规模: {args.scale}，重复: {args.repeat}")
+    print(f"{'场景':<30} {'耗时':>11} {'条目':>9} {'吞吐':>16}")
+
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+        results = run_benchmarks(args.scale, args.repeat, args.keep, args.only)
+    else:
+        with tempfile.TemporaryDirectory(prefix="renamefile_bench_") as work_dir:
+            results = run_benchmarks(args.scale, args.repeat, work_dir, args.only)
+
+    if args.output:
+        data = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "commit": _git_commit(),
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "scale": args.scale,
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.output}")
+
+    if args.compare:
+        return 1 if compare(args.compare, results) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,380 @@
+"""
+命令行批处理入口 - 文件批量重命名工具
+不询问任何问题，所有设置由参数给出；一次运行可以处理多个源目录，
+规则只加载、编译一次，所有源目录共用同一个 FileRenamer
+
+示例:
+    python cli.py --mode simple --output D:\\out D:\\photos D:\\scans
+    python cli.py --mode regex --digits 3 --jobs jobs.txt --output D:\\out --workers 4
+"""
+
+import argparse
+import os
+import re
+import sys
+from typing import Optional
+
+from modules.loader import RuleLoader
+from modules.configurator import PresetConfigurator
+from modules.copier import COPY_BACKENDS, DEFAULT_CHUNK_SIZE, PRESERVE_OPTIONS, FileCopier
+from modules.dedupe import DEDUPE_MODES
+from modules.filters import FileFilter, parse_size
+from modules.output import OUTPUT_MODES, contains_path
+from modules.events import SUMMARY, DIRECTORY, FILE, print_events
+from main import FileRenamer, DEFAULT_CACHE_SIZE
+
+
+# 日志级别参数
+LOG_LEVELS = {"summary": SUMMARY, "directory": DIRECTORY, "file": FILE}
+
+
+class Job:
+    """一个待处理的源目录"""
+
+    __slots__ = ("source", "output")
+
+    def __init__(self, source: str, output: Optional[str] = None):
+        """
+        Args:
+            source: 源目录
+            output: 输出目录，None 表示按 --output 自动分配
+        """
+        self.source = source
+        self.output = output
+
+
+def read_jobs(path):
+    """
+    读取任务文件
+
+    每行一个源目录，可以用 ==> 指定该目录的输出目录：
+        D:\\photos
+        D:\\scans ==> D:\\out\\scans
+    # 开头的行和空行忽略；相对路径相对于任务文件所在目录
+
+    Args:
+        path: 任务文件路径
+
+    Returns:
+        Job 列表
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            output = None
+            if "==>" in line:
+                line, output = (part.strip() for part in line.split("==>", 1))
+                output = os.path.join(base_dir, output)
+            jobs.append(Job(os.path.join(base_dir, line), output))
+    return jobs
+
+
+def assign_outputs(jobs, output_dir):
+    """
+    为没有指定输出目录的任务分配输出目录
+
+    只有一个源目录时直接输出到 output_dir；多个源目录时各自输出到
+    output_dir 下以源目录名命名的子目录，同名时加后缀
+    """
+    pending = [job for job in jobs if job.output is None]
+    if len(jobs) == 1 and pending:
+        pending[0].output = output_dir
+        return
+
+    used = {os.path.normcase(os.path.abspath(job.output)) for job in jobs if job.output}
+    for job in pending:
+        name = os.path.basename(os.path.normpath(job.source)) or "root"
+        candidate = os.path.join(output_dir, name)
+        counter = 1
+        while os.path.normcase(os.path.abspath(candidate)) in used:
+            candidate = os.path.join(output_dir, f"{name}_{counter}")
+            counter += 1
+        used.add(os.path.normcase(os.path.abspath(candidate)))
+        job.output = candidate
+
+
+def check_job(job):
+    """检查任务是否可以执行，返回错误信息；没有问题时返回 None"""
+    if not os.path.isdir(job.source):
+        return f"无效的目录路径: {job.source}"
+    # 输出目录不能是源目录本身或其上级
+    if contains_path(job.output, job.source):
+        return f"输出目录不能是源目录或其上级目录: {job.output}"
+    return None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="批量重命名文件（非交互）：按规则把一个或多个源目录的文件复制 / 链接到输出目录"
+    )
+    parser.add_argument("sources", nargs="*", help="源目录，可以给多个")
+    parser.add_argument(
+        "--jobs",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="任务文件，每行一个源目录（可用 ==> 指定输出目录），可以给多个",
+    )
+    parser.add_argument(
+        "--mode", choices=["simple", "regex"], default="simple", help="规则模式（默认 simple）"
+    )
+    parser.add_argument(
+        "--rules",
+        metavar="FILE",
+        help="规则文件，默认为脚本目录下的 words.txt / regex_rules.txt",
+    )
+    parser.add_argument("--output", "-o", required=True, help="输出目录")
+    parser.add_argument(
+        "--keep-structure", action="store_true", help="保持原文件夹结构（默认平铺）"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="并发复制线程数（默认 1）")
+    parser.add_argument("--processes", type=int, default=1, help="规则计算进程数（默认 1）")
+    parser.add_argument(
+        "--output-mode", choices=list(OUTPUT_MODES), default="copy", help="输出方式（默认 copy）"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true", help="跳过上次已完成且未变化的文件"
+    )
+    parser.add_argument("--dedupe", choices=list(DEDUPE_MODES), help="内容去重方式")
+    parser.add_argument(
+        "--copy-backend", choices=list(COPY_BACKENDS), default="auto", help="复制后端（默认 auto）"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE // (1024 * 1024),
+        metavar="MB",
+        help=f"单次复制的块大小，MB（默认 {DEFAULT_CHUNK_SIZE // (1024 * 1024)}）",
+    )
+    parser.add_argument(
+        "--preserve", choices=list(PRESERVE_OPTIONS), default="all", help="复制时保留的元数据"
+    )
+    parser.add_argument(
+        "--rule-timeout", type=float, metavar="SECONDS", help="单条正则规则处理一个文件名的耗时上限"
+    )
+    parser.add_argument(
+        "--digits", type=int, help="提取数字规则和 {number} 占位符的补零位数（正则模式）"
+    )
+    parser.add_argument("--uppercase", action="store_true", help="提取文本规则转换为大写")
+    parser.add_argument("--lowercase", action="store_true", help="提取文本规则转换为小写")
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="只处理匹配的文件：glob（不含 / 时匹配文件名）或 re: 开头的正则，可以给多次",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="排除匹配的文件，以 / 结尾表示目录（如 .git/），可以给多次",
+    )
+    parser.add_argument(
+        "--exclude-dir",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="排除的目录（匹配目录名或相对路径），遍历时整棵跳过，可以给多次",
+    )
+    parser.add_argument(
+        "--ext", action="append", default=[], metavar="EXT", help="只处理这些扩展名，可以给多次"
+    )
+    parser.add_argument(
+        "--exclude-ext", action="append", default=[], metavar="EXT", help="排除这些扩展名"
+    )
+    parser.add_argument("--min-size", type=parse_size, metavar="SIZE", help="最小文件大小，如 10K")
+    parser.add_argument("--max-size", type=parse_size, metavar="SIZE", help="最大文件大小，如 2G")
+    parser.add_argument(
+        "--memory-budget",
+        type=parse_size,
+        metavar="SIZE",
+        help="冲突检测和去重数据的内存预算，如 512M，超过后转存到临时 SQLite 文件（默认不限制）",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="处理完已有文件后持续监视源目录，新文件写完即处理，Ctrl+C 停止（只能给一个源目录）",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        metavar="SECONDS",
+        help="监视模式下文件多久不再变化视为写完（默认 2）",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=2.0,
+        metavar="SECONDS",
+        help="inotify 不可用时的轮询间隔（默认 2）",
+    )
+    parser.add_argument(
+        "--watch-backend",
+        choices=["auto", "inotify", "polling"],
+        default="auto",
+        help="监视方式（默认 auto，Linux 上使用 inotify）",
+    )
+    parser.add_argument(
+        "--log-level",
+        choices=list(LOG_LEVELS),
+        default="directory",
+        help="控制台输出级别（默认 directory）",
+    )
+    return parser
+
+
+def build_filter(args):
+    """按参数创建文件过滤器，没有给出任何过滤条件时返回 None"""
+    file_filter = FileFilter(
+        include=args.include,
+        exclude=args.exclude,
+        exclude_dirs=args.exclude_dir,
+        extensions=args.ext,
+        exclude_extensions=args.exclude_ext,
+        min_size=args.min_size,
+        max_size=args.max_size,
+    )
+    return file_filter if file_filter.active else None
+
+
+def load_rules(args, script_dir):
+    """按参数加载规则，交互式规则的参数取自参数或规则缓存，不询问"""
+    if args.mode == "simple":
+        loader = RuleLoader(script_dir)
+        return loader.load_simple_rules(args.rules)
+
+    configurator = PresetConfigurator(
+        digits=args.digits, uppercase=args.uppercase, lowercase=args.lowercase
+    )
+    loader = RuleLoader(script_dir, configurator)
+    # 显式给出参数时覆盖缓存中的参数
+    refresh = args.digits is not None or args.uppercase or args.lowercase
+    return loader.load_regex_rules(interactive=True, refresh=refresh, rules_file=args.rules)
+
+
+def watch(renamer, job, args):
+    """监视模式，Ctrl+C 停止后打印统计"""
+    print(f"\n监视 {job.source} -> {job.output}，按 Ctrl+C 停止")
+    try:
+        renamer.watch(
+            job.source,
+            args.keep_structure,
+            job.output,
+            workers=args.workers,
+            output_mode=args.output_mode,
+            settle=args.settle,
+            interval=args.poll_interval,
+            backend=args.watch_backend,
+        )
+    except KeyboardInterrupt:
+        renamer.cancel()
+    except OSError as e:
+        print(f" 错误: 无法监视 {job.source}: {e}")
+        return 2
+    renamer.print_stats(job.output)
+    return 1 if renamer.stats["errors"] else 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    if args.workers < 1 or args.processes < 1 or args.chunk_size < 1:
+        parser.error("--workers、--processes、--chunk-size 必须大于 0")
+    if args.digits is not None and args.digits < 1:
+        parser.error("--digits 必须大于 0")
+    try:
+        file_filter = build_filter(args)
+    except re.error as e:
+        parser.error(f"无效的过滤正则: {e}")
+
+    jobs = [Job(source) for source in args.sources]
+    for path in args.jobs:
+        try:
+            jobs.extend(read_jobs(path))
+        except OSError as e:
+            parser.error(f"无法读取任务文件 {path}: {e}")
+    if not jobs:
+        parser.error("没有给出源目录")
+    if args.watch and len(jobs) > 1:
+        parser.error("--watch 只能给一个源目录")
+    if args.watch and args.dedupe:
+        parser.error("--watch 不支持 --dedupe")
+    if args.watch and args.processes > 1:
+        parser.error("--watch 不支持 --processes")
+
+    output_dir = os.path.abspath(args.output)
+    assign_outputs(jobs, output_dir)
+    problems = [problem for problem in map(check_job, jobs) if problem]
+    if problems:
+        for problem in problems:
+            print(f" 错误: {problem}")
+        return 2
+
+    # 规则只加载、编译一次
+    print("加载规则...")
+    try:
+        rules = load_rules(args, script_dir)
+    except ValueError as e:
+        print(f" 错误: {e}（用 --digits 等参数给出）")
+        return 2
+    if not rules:
+        return 2
+
+    renamer = FileRenamer(
+        cache_size=DEFAULT_CACHE_SIZE,
+        rule_timeout=args.rule_timeout,
+        copier=FileCopier(args.copy_backend, args.chunk_size * 1024 * 1024, args.preserve),
+        file_filter=file_filter,
+        memory_budget=args.memory_budget,
+    )
+    renamer.set_rules(rules)
+    renamer.subscribe(print_events, LOG_LEVELS[args.log_level], batch_size=256, interval=0.2)
+
+    if args.watch:
+        return watch(renamer, jobs[0], args)
+
+    try:
+        for index, job in enumerate(jobs, 1):
+            before = dict(renamer.stats)
+            print(f"\n[{index}/{len(jobs)}] {job.source} -> {job.output}")
+            renamer.process_files(
+                job.source,
+                args.keep_structure,
+                job.output,
+                workers=args.workers,
+                output_mode=args.output_mode,
+                incremental=args.incremental,
+                processes=args.processes,
+                dedupe=args.dedupe,
+            )
+            delta = {
+                key: renamer.stats[key] - before[key]
+                for key in ("total", "renamed", "errors", "filtered")
+            }
+            filtered = f"，过滤 {delta['filtered']}" if delta["filtered"] else ""
+            print(
+                f"[{index}/{len(jobs)}] 完成: 总文件数 {delta['total']}，"
+                f"重命名 {delta['renamed']}，错误 {delta['errors']}{filtered}"
+            )
+    except KeyboardInterrupt:
+        renamer.cancel()
+        renamer.print_stats(output_dir)
+        return 130
+
+    # 所有源目录的合计
+    print(f"\n共处理 {len(jobs)} 个源目录")
+    renamer.print_stats(output_dir)
+    return 1 if renamer.stats["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
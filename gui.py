@@ -8,6 +8,8 @@ import sys
 import shutil
 import threading
 import queue
+import re
+import time
 from tkinter import filedialog, messagebox, simpledialog, StringVar, IntVar, BooleanVar
 from typing import Optional
 
@@ -21,7 +23,78 @@ except ImportError:
 
 from modules.loader import RuleLoader
 from modules.configurator import InteractiveConfigurator
-from main import FileRenamer
+from modules.output import OUTPUT_MODES, can_clear, contains_path
+from modules.dedupe import DEDUPE_MODES
+from modules.copier import FileCopier, PRESERVE_OPTIONS
+from modules.events import FILE, LEVEL_NAMES
+from modules.walker import count_tree
+from modules.filters import COMMON_EXCLUDES, FileFilter, split_patterns
+from main import FileRenamer, DEFAULT_CACHE_SIZE
+
+
+# 内容去重下拉框中“不去重”的选项
+NO_DEDUPE = "不去重"
+
+class LogView:
+    """
+    有界日志视图
+
+    文本框最多保留 max_lines 行，超出部分从顶部删除；
+    可同时把完整日志写入磁盘文件
+    """
+
+    def __init__(self, text_widget, max_lines: int = 5000):
+        self.text = text_widget
+        self.max_lines = max_lines
+        self.line_count = 0
+        self._spill_file = None
+        self._spill_lock = threading.Lock()
+
+    def show(self, messages):
+        """一次性插入一批消息（只能在主线程调用）"""
+        chunk = "\n".join(messages) + "\n"
+        lines = chunk.count("\n")
+
+        # 这一批本身就超过上限时，只插入末尾部分
+        if lines >= self.max_lines:
+            chunk = "\n".join(chunk.split("\n")[-self.max_lines - 1 :])
+            lines = self.max_lines
+            self.text.delete(1.0, END)
+            self.line_count = 0
+
+        self.text.insert(END, chunk)
+        self.line_count += lines
+
+        excess = self.line_count - self.max_lines
+        if excess > 0:
+            self.text.delete(1.0, f"{excess + 1}.0")
+            self.line_count = self.max_lines
+
+        self.text.see(END)
+
+    def clear(self):
+        """清空文本框"""
+        self.text.delete(1.0, END)
+        self.line_count = 0
+
+    def start_spill(self, path: str):
+        """开始把完整日志写入文件"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._spill_lock:
+            self._spill_file = open(path, "w", encoding="utf-8")
+
+    def spill(self, message: str):
+        """写入完整日志（可在任意线程调用）"""
+        with self._spill_lock:
+            if self._spill_file is not None:
+                self._spill_file.write(message + "\n")
+
+    def stop_spill(self):
+        """停止写入完整日志"""
+        with self._spill_lock:
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
 
 
 class ReNameFileGUI:
@@ -40,6 +113,21 @@ class ReNameFileGUI:
         self.mode = IntVar(value=1)  # 默认简单模式
         self.keep_structure = BooleanVar(value=True)
         self.clear_output = BooleanVar(value=False)
+        self.incremental = BooleanVar(value=False)
+        self.workers = IntVar(value=4)
+        self.processes = IntVar(value=1)
+        self.output_dir = StringVar(value=os.path.join(self.script_dir, "output"))
+        self.output_mode = StringVar(value=OUTPUT_MODES["copy"])
+        self.dedupe = StringVar(value=NO_DEDUPE)
+        self.preserve = StringVar(value=PRESERVE_OPTIONS["all"])
+        self.log_level = StringVar(value=LEVEL_NAMES[FILE])
+        self.save_log = BooleanVar(value=False)
+        self.profile_rules = BooleanVar(value=False)
+        self.reconfigure_rules = BooleanVar(value=False)
+        self.watch = BooleanVar(value=False)
+        self.rule_timeout = StringVar(value="")
+        self.include_patterns = StringVar(value="")
+        self.exclude_patterns = StringVar(value="")
 
         # 任务相关
         self.is_running = False
@@ -47,6 +135,12 @@ class ReNameFileGUI:
         self.input_queue = queue.Queue()  # 用于GUI输入的队列
         self.input_response_queue = queue.Queue()  # 用于输入响应的队列
 
+        # 进度相关
+        self.renamer: Optional[FileRenamer] = None
+        self.cancel_event = threading.Event()
+        self.progress_total = (0, 0)  # 预统计的 (文件数, 字节数)
+        self.progress_start = 0.0
+
         # 创建界面
         self._create_widgets()
 
@@ -76,6 +170,45 @@ class ReNameFileGUI:
             input_frame, text="(支持直接拖拽文件夹到此处)", font=("", 9)
         ).pack(pady=(5, 0))
 
+        output_frame = ttk.Frame(input_frame)
+        output_frame.pack(fill=X, pady=(5, 0))
+
+        ttk.Label(output_frame, text="输出目录:").pack(side=LEFT, padx=(0, 5))
+
+        ttk.Entry(
+            output_frame, textvariable=self.output_dir, width=50
+        ).pack(side=LEFT, fill=X, expand=True, padx=(0, 5))
+
+        ttk.Button(
+            output_frame,
+            text="浏览...",
+            command=self._browse_output_directory,
+            bootstyle="info",
+        ).pack(side=LEFT)
+
+        # 文件过滤：多个模式用空格或逗号分隔
+        filter_frame = ttk.Frame(input_frame)
+        filter_frame.pack(fill=X, pady=(5, 0))
+
+        ttk.Label(filter_frame, text="只处理:").pack(side=LEFT, padx=(0, 5))
+
+        ttk.Entry(
+            filter_frame, textvariable=self.include_patterns, width=20
+        ).pack(side=LEFT, fill=X, expand=True, padx=(0, 5))
+
+        ttk.Label(filter_frame, text="排除:").pack(side=LEFT, padx=(10, 5))
+
+        ttk.Entry(
+            filter_frame, textvariable=self.exclude_patterns, width=30
+        ).pack(side=LEFT, fill=X, expand=True, padx=(0, 5))
+
+        ttk.Button(
+            filter_frame,
+            text="常用排除",
+            command=lambda: self.exclude_patterns.set(" ".join(COMMON_EXCLUDES)),
+            bootstyle="info-outline",
+        ).pack(side=LEFT)
+
         # 区域2: 控制台
         control_frame = ttk.Labelframe(
             self.root, text="控制台", padding=10, bootstyle="primary"
@@ -142,21 +275,149 @@ class ReNameFileGUI:
             bootstyle="primary-round-toggle",
         ).pack(anchor=W, pady=2)
 
+        ttk.Checkbutton(
+            control_frame,
+            text="增量运行 (跳过上次已完成且未变化的文件)",
+            variable=self.incremental,
+            bootstyle="primary-round-toggle",
+        ).pack(anchor=W, pady=2)
+
+        ttk.Checkbutton(
+            control_frame,
+            text="持续监视 (处理完已有文件后继续处理新到达的文件，点取消停止)",
+            variable=self.watch,
+            bootstyle="primary-round-toggle",
+        ).pack(anchor=W, pady=2)
+
+        ttk.Checkbutton(
+            control_frame,
+            text="保存完整日志到 logs 目录 (界面只保留最近的日志)",
+            variable=self.save_log,
+            bootstyle="primary-round-toggle",
+        ).pack(anchor=W, pady=2)
+
+        ttk.Checkbutton(
+            control_frame,
+            text="统计每条规则的耗时和命中次数 (处理会变慢)",
+            variable=self.profile_rules,
+            bootstyle="primary-round-toggle",
+        ).pack(anchor=W, pady=2)
+
+        ttk.Checkbutton(
+            control_frame,
+            text="重新设置正则规则参数 (不使用上次保存的参数)",
+            variable=self.reconfigure_rules,
+            bootstyle="primary-round-toggle",
+        ).pack(anchor=W, pady=2)
+
+        workers_frame = ttk.Frame(control_frame)
+        workers_frame.pack(anchor=W, pady=2)
+
+        ttk.Label(workers_frame, text="并发复制线程数:").pack(side=LEFT)
+
+        ttk.Spinbox(
+            workers_frame,
+            from_=1,
+            to=64,
+            textvariable=self.workers,
+            width=5,
+        ).pack(side=LEFT, padx=5)
+
+        ttk.Label(workers_frame, text="规则计算进程数:").pack(side=LEFT, padx=(15, 0))
+
+        ttk.Spinbox(
+            workers_frame,
+            from_=1,
+            to=os.cpu_count() or 1,
+            textvariable=self.processes,
+            width=4,
+        ).pack(side=LEFT, padx=5)
+
+        ttk.Label(workers_frame, text="输出方式:").pack(side=LEFT, padx=(15, 0))
+
+        ttk.Combobox(
+            workers_frame,
+            textvariable=self.output_mode,
+            values=list(OUTPUT_MODES.values()),
+            state="readonly",
+            width=14,
+        ).pack(side=LEFT, padx=5)
+
+        ttk.Label(workers_frame, text="内容去重:").pack(side=LEFT, padx=(15, 0))
+
+        ttk.Combobox(
+            workers_frame,
+            textvariable=self.dedupe,
+            values=[NO_DEDUPE] + list(DEDUPE_MODES.values()),
+            state="readonly",
+            width=12,
+        ).pack(side=LEFT, padx=5)
+
+        ttk.Label(workers_frame, text="保留元数据:").pack(side=LEFT, padx=(15, 0))
+
+        ttk.Combobox(
+            workers_frame,
+            textvariable=self.preserve,
+            values=list(PRESERVE_OPTIONS.values()),
+            state="readonly",
+            width=10,
+        ).pack(side=LEFT, padx=5)
+
+        ttk.Label(workers_frame, text="日志级别:").pack(side=LEFT, padx=(15, 0))
+
+        ttk.Combobox(
+            workers_frame,
+            textvariable=self.log_level,
+            values=list(LEVEL_NAMES.values()),
+            state="readonly",
+            width=6,
+        ).pack(side=LEFT, padx=5)
+
+        ttk.Label(workers_frame, text="规则超时(秒):").pack(side=LEFT, padx=(15, 0))
+
+        ttk.Entry(
+            workers_frame,
+            textvariable=self.rule_timeout,
+            width=6,
+        ).pack(side=LEFT, padx=5)
+
         # 区域3: 执行与反馈
         exec_frame = ttk.Labelframe(
             self.root, text="执行与反馈", padding=10, bootstyle="primary"
         )
         exec_frame.pack(fill=BOTH, expand=True, padx=10, pady=5)
 
-        # 开始按钮
+        # 开始 / 取消按钮
+        button_frame = ttk.Frame(exec_frame)
+        button_frame.pack(pady=(0, 10))
+
         self.start_button = ttk.Button(
-            exec_frame,
+            button_frame,
             text="▶ 开始重命名 (Start)",
             command=self._start_rename,
             bootstyle="success",
             width=30,
         )
-        self.start_button.pack(pady=(0, 10))
+        self.start_button.pack(side=LEFT, padx=5)
+
+        self.cancel_button = ttk.Button(
+            button_frame,
+            text="■ 取消 (Cancel)",
+            command=self._cancel_rename,
+            bootstyle="danger-outline",
+            width=15,
+            state=DISABLED,
+        )
+        self.cancel_button.pack(side=LEFT, padx=5)
+
+        # 进度条与速率
+        self.progress_bar = ttk.Progressbar(
+            exec_frame, mode="determinate", maximum=100, bootstyle="success-striped"
+        )
+        self.progress_bar.pack(fill=X, pady=(0, 2))
+
+        self.progress_label = ttk.Label(exec_frame, text="", font=("", 9))
+        self.progress_label.pack(anchor=W, pady=(0, 5))
 
         # 日志输出
         log_label = ttk.Label(exec_frame, text="日志输出:", font=("", 10, "bold"))
@@ -179,6 +440,8 @@ class ReNameFileGUI:
         self.log_text.pack(side=LEFT, fill=BOTH, expand=True)
         scrollbar.config(command=self.log_text.yview)
 
+        self.log_view = LogView(self.log_text)
+
         # 初始日志
         self._log("[INFO] 就绪，请选择目标目录并点击开始")
 
@@ -188,6 +451,12 @@ class ReNameFileGUI:
         if directory:
             self.target_dir.set(directory)
 
+    def _browse_output_directory(self):
+        """浏览选择输出目录"""
+        directory = filedialog.askdirectory(title="选择输出目录")
+        if directory:
+            self.output_dir.set(directory)
+
     def _edit_rules(self, filename):
         """编辑规则文件"""
         filepath = os.path.join(self.script_dir, filename)
@@ -213,17 +482,19 @@ class ReNameFileGUI:
     def _log(self, message):
         """添加日志到队列"""
         self.log_queue.put(message)
+        self.log_view.spill(message)
 
     def _update_log(self):
-        """从队列更新日志显示"""
+        """从队列更新日志显示：每次把队列中的消息合并为一次插入"""
+        messages = []
         try:
             while True:
-                message = self.log_queue.get_nowait()
-                self.log_text.insert(END, message + "\n")
-                self.log_text.see(END)
+                messages.append(self.log_queue.get_nowait())
         except queue.Empty:
             pass
         finally:
+            if messages:
+                self.log_view.show(messages)
             self.root.after(100, self._update_log)
 
     def _validate_inputs(self) -> bool:
@@ -238,6 +509,16 @@ class ReNameFileGUI:
             messagebox.showerror("错误", "目标目录不存在或无效")
             return False
 
+        # 检查输出目录，不能是源目录本身或其上级，否则清空时会删掉源文件
+        output = self.output_dir.get().strip()
+        if not output:
+            messagebox.showerror("错误", "请选择输出目录")
+            return False
+
+        if contains_path(output, target):
+            messagebox.showerror("错误", "输出目录不能是目标目录或其上级目录")
+            return False
+
         # 检查规则文件
         mode = self.mode.get()
         if mode == 1:
@@ -283,6 +564,10 @@ class ReNameFileGUI:
         """GUI输出函数"""
         self._log(message)
 
+    def _on_events(self, events):
+        """接收 FileRenamer 的一批进度事件"""
+        self._log("\n".join(event.message for event in events))
+
     def _start_rename(self):
         """开始重命名任务"""
         if self.is_running:
@@ -294,19 +579,84 @@ class ReNameFileGUI:
 
         # 禁用按钮
         self.start_button.config(state=DISABLED)
+        self.cancel_button.config(state=NORMAL)
         self.is_running = True
 
+        # 重置进度
+        self.renamer = None
+        self.cancel_event.clear()
+        self.progress_total = (0, 0)
+        self.progress_bar.config(value=0)
+        self.progress_label.config(text="正在统计文件...")
+
         # 清空日志
-        self.log_text.delete(1.0, END)
+        self.log_view.clear()
+        log_path = None
+        if self.save_log.get():
+            log_path = os.path.join(
+                self.script_dir, "logs", time.strftime("rename_%Y%m%d_%H%M%S.log")
+            )
+            self.log_view.start_spill(log_path)
         self._log("[INFO] 任务开始...")
+        if log_path:
+            self._log(f"[INFO] 完整日志: {log_path}")
 
-        # 启动输入检查
+        # 启动输入检查与进度刷新
         self.root.after(100, self._check_input_queue)
+        self.root.after(500, self._update_progress)
 
         # 在子线程中执行
         thread = threading.Thread(target=self._rename_worker, daemon=True)
         thread.start()
 
+    def _cancel_rename(self):
+        """取消任务：当前文件处理完后停止"""
+        self.cancel_event.set()
+        if self.renamer is not None:
+            self.renamer.cancel()
+        self.cancel_button.config(state=DISABLED)
+        self._log("[INFO] 正在取消...")
+
+    @staticmethod
+    def _format_duration(seconds: float) -> str:
+        seconds = int(seconds)
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+    def _update_progress(self):
+        """定时刷新进度条、速率和预计剩余时间"""
+        renamer = self.renamer
+        total_files, total_bytes = self.progress_total
+
+        if renamer is not None and total_files:
+            # 取消请求可能早于 process_files 开始，这里补发
+            if self.cancel_event.is_set() and not renamer.cancelled:
+                renamer.cancel()
+
+            progress = renamer.progress()
+            elapsed = max(time.monotonic() - self.progress_start, 1e-6)
+            files_rate = progress["files"] / elapsed
+            bytes_rate = progress["bytes"] / elapsed
+
+            if total_bytes and bytes_rate > 0:
+                eta = max(total_bytes - progress["bytes"], 0) / bytes_rate
+            elif files_rate > 0:
+                eta = max(total_files - progress["files"], 0) / files_rate
+            else:
+                eta = None
+
+            self.progress_bar.config(value=min(100, progress["files"] * 100 / total_files))
+            self.progress_label.config(
+                text=(
+                    f"{progress['files']}/{total_files} 个文件  "
+                    f"{files_rate:.1f} 个/秒  {bytes_rate / 1024 / 1024:.1f} MB/秒  "
+                    f"已用 {self._format_duration(elapsed)}  "
+                    f"剩余 {self._format_duration(eta) if eta is not None else '--:--:--'}"
+                )
+            )
+
+        if self.is_running:
+            self.root.after(500, self._update_progress)
+
     def _rename_worker(self):
         """重命名工作线程"""
         try:
@@ -314,13 +664,68 @@ class ReNameFileGUI:
             mode = self.mode.get()
             keep_structure = self.keep_structure.get()
             clear_output = self.clear_output.get()
+            incremental = self.incremental.get()
+            profile = self.profile_rules.get()
+            reconfigure = self.reconfigure_rules.get()
+            watch = self.watch.get()
+            try:
+                rule_timeout = max(float(self.rule_timeout.get().strip() or 0), 0) or None
+            except ValueError:
+                rule_timeout = None
+            try:
+                workers = max(1, self.workers.get())
+            except Exception:
+                workers = 1
+            try:
+                processes = max(1, self.processes.get())
+            except Exception:
+                processes = 1
+
+            # 日志级别
+            log_level = FILE
+            for level, label in LEVEL_NAMES.items():
+                if label == self.log_level.get():
+                    log_level = level
+
+            # 输出方式
+            output_mode = "copy"
+            for name, label in OUTPUT_MODES.items():
+                if label == self.output_mode.get():
+                    output_mode = name
+
+            # 内容去重，只在复制和克隆时生效
+            dedupe = None
+            for name, label in DEDUPE_MODES.items():
+                if label == self.dedupe.get():
+                    dedupe = name
+
+            # 复制时保留的元数据
+            preserve = "all"
+            for name, label in PRESERVE_OPTIONS.items():
+                if label == self.preserve.get():
+                    preserve = name
+
+            # 文件过滤，以 / 结尾的排除模式表示目录
+            try:
+                file_filter = FileFilter(
+                    include=split_patterns(self.include_patterns.get()),
+                    exclude=split_patterns(self.exclude_patterns.get()),
+                )
+            except re.error as e:
+                self._log(f"[ERROR] 无效的过滤正则: {e}")
+                return
+            if not file_filter.active:
+                file_filter = None
 
             # 创建输出目录
-            output_dir = os.path.join(self.script_dir, "output")
+            output_dir = self.output_dir.get().strip()
 
             if os.path.exists(output_dir) and clear_output:
-                self._log("[INFO] 清空旧的 output 目录...")
-                shutil.rmtree(output_dir)
+                if can_clear(output_dir, target_dir):
+                    self._log("[INFO] 清空旧的 output 目录...")
+                    shutil.rmtree(output_dir)
+                else:
+                    self._log("[ERROR] 不能清空根目录或目标目录的上级目录，保留已有文件")
 
             os.makedirs(output_dir, exist_ok=True)
 
@@ -341,7 +746,7 @@ class ReNameFileGUI:
                 rules = rule_loader.load_simple_rules()
                 self._log(f"[INFO] 加载规则 words.txt... 成功 ({len(rules)}条)")
             else:
-                rules = rule_loader.load_regex_rules(interactive=True)
+                rules = rule_loader.load_regex_rules(interactive=True, refresh=reconfigure)
                 self._log(f"[INFO] 加载规则 regex_rules.txt... 成功 ({len(rules)}条)")
 
             if not rules:
@@ -349,40 +754,105 @@ class ReNameFileGUI:
                 return
 
             # 创建重命名器
-            renamer = FileRenamer()
+            renamer = FileRenamer(
+                cache_size=DEFAULT_CACHE_SIZE,
+                profile=profile,
+                rule_timeout=rule_timeout,
+                copier=FileCopier(preserve=preserve),
+                file_filter=file_filter,
+            )
             renamer.set_rules(rules)
 
-            # 重定向输出
-            original_print = print
+            # 订阅处理进度，批量送入日志队列
+            renamer.subscribe(self._on_events, log_level, batch_size=200, interval=0.1)
 
-            def gui_print(*args, **kwargs):
-                message = " ".join(str(arg) for arg in args)
-                self._log(message)
-
-            # 临时替换print
-            import builtins
-            builtins.print = gui_print
+            # 预统计文件数和总大小，用于进度条和剩余时间
+            self._log("[INFO] 统计文件数量...")
+            total_files, total_bytes = count_tree(
+                target_dir, [output_dir], self.cancel_event, file_filter
+            )
+            if self.cancel_event.is_set():
+                self._log("[INFO] 已取消")
+                return
+            self._log(
+                f"[INFO] 共 {total_files} 个文件，{total_bytes / 1024 / 1024:.1f} MB"
+            )
+            self.progress_start = time.monotonic()
+            self.progress_total = (total_files, total_bytes)
+            self.renamer = renamer
 
             # 处理文件
             self._log(f"[INFO] 开始处理文件...")
-            renamer.process_files(target_dir, keep_structure, output_dir)
-
-            # 恢复print
-            builtins.print = original_print
+            if watch:
+                # 监视模式一直运行到点击取消，始终使用运行清单
+                renamer.watch(
+                    target_dir,
+                    keep_structure,
+                    output_dir,
+                    workers=workers,
+                    output_mode=output_mode,
+                )
+            else:
+                renamer.process_files(
+                    target_dir,
+                    keep_structure,
+                    output_dir,
+                    workers=workers,
+                    output_mode=output_mode,
+                    incremental=incremental,
+                    processes=processes,
+                    dedupe=dedupe,
+                )
 
             # 显示统计
             stats = renamer.stats
             self._log("\n" + "=" * 60)
-            self._log(f"[SUCCESS] 处理完成！")
+            if renamer.cancelled:
+                self._log(f"[INFO] 已取消，以下为取消前的统计")
+            else:
+                self._log(f"[SUCCESS] 处理完成！")
             self._log(f"总文件数:     {stats['total']}")
             self._log(f"重命名文件数: {stats['renamed']}")
             self._log(f"仅复制文件数: {stats['copied']}")
             self._log(f"错误数:       {stats['errors']}")
+            if stats["fallback"]:
+                self._log(f"回退为复制:   {stats['fallback']}")
+            if stats["collisions"]:
+                self._log(f"重名冲突数:   {stats['collisions']}")
+            if stats["skipped"]:
+                self._log(f"未变化跳过:   {stats['skipped']}")
+            if stats["filtered"]:
+                self._log(f"过滤文件数:   {stats['filtered']}")
+            if stats["pruned"]:
+                self._log(f"跳过目录数:   {stats['pruned']}")
+            if stats["timeouts"]:
+                self._log(f"超时停用规则: {stats['timeouts']}")
+            if stats["duplicates"]:
+                self._log(
+                    f"重复文件数:   {stats['duplicates']}"
+                    f" (节省 {stats['saved_bytes'] / 1024 / 1024:.1f} MB)"
+                )
+            if renamer.copier.used:
+                self._log(f"复制方式:     {renamer.copier.report()}")
+            cache = renamer.cache_info()
+            if cache and cache["hits"] + cache["misses"]:
+                self._log(
+                    f"文件名缓存:   命中 {cache['hits']} / 未命中 {cache['misses']}"
+                )
             self._log(f"输出目录:     {output_dir}")
             self._log("=" * 60)
 
+            # 规则耗时统计
+            if renamer.profiler is not None:
+                for line in renamer.profiler.format_report():
+                    self._log(line)
+                self._log("=" * 60)
+
             # 弹出完成提示
-            self.root.after(0, lambda: messagebox.showinfo("完成", "文件处理完毕！"))
+            if renamer.cancelled:
+                self.root.after(0, lambda: messagebox.showinfo("已取消", "任务已取消"))
+            else:
+                self.root.after(0, lambda: messagebox.showinfo("完成", "文件处理完毕！"))
 
         except Exception as e:
             self._log(f"[ERROR] 发生错误: {str(e)}")
@@ -391,9 +861,13 @@ class ReNameFileGUI:
             self.root.after(0, lambda: messagebox.showerror("错误", f"处理失败:\n{str(e)}"))
 
         finally:
-            # 恢复按钮
+            self.log_view.stop_spill()
+
+            # 恢复按钮，最后刷新一次进度
             self.is_running = False
+            self.root.after(0, self._update_progress)
             self.root.after(0, lambda: self.start_button.config(state=NORMAL))
+            self.root.after(0, lambda: self.cancel_button.config(state=DISABLED))
 
 
 def main():
@@ -1,170 +1,910 @@
+import concurrent.futures
+import itertools
 import os
 import re
 import shutil
+import threading
+import time
 
 from modules.loader import RuleLoader
+from modules.compiler import RuleCompiler, CompiledRule
+from modules.profiler import RuleProfiler
+from modules.batch import apply_batch
+from modules.cache import LRUCache
+from modules.budget import RuleBudget
+from modules.output import OUTPUT_MODES, can_clear, contains_path, materialize
+from modules.copier import FileCopier, PRESERVE_OPTIONS
+from modules.dedupe import DEDUPE_MODES, DuplicateIndex
+from modules.filters import FileFilter, parse_size, split_patterns
+from modules.pipeline import PlanItem, background, ordered_map, run_stage
+from modules.plan_file import PlanWriter, read_plan
+from modules.walker import FileEntry, scan_tree
+from modules.watcher import Debouncer, InotifyWatcher, create_watcher
+from modules.namespace import DestinationIndex
+from modules.plan_store import PlanStore
+from modules.manifest import RunManifest
+from modules.types import rules_fingerprint
+from modules.events import EventBus, SUMMARY, DIRECTORY, FILE, print_events
+
+
+# 交互入口使用的文件名缓存容量
+DEFAULT_CACHE_SIZE = 65536
+
+# 规划阶段每批应用规则的文件数
+PLAN_BATCH_SIZE = 512
+
+# 监视模式下两次检查取消请求的最长间隔（秒）
+WATCH_POLL_SECONDS = 0.5
 
 
 class FileRenamer:
-    def __init__(self):
+    def __init__(
+        self,
+        cache_size=0,
+        profile=False,
+        rule_timeout=None,
+        copier=None,
+        file_filter=None,
+        memory_budget=None,
+    ):
+        """
+        :param cache_size: 文件名转换结果的 LRU 缓存容量，0 表示不缓存
+        :param profile: 是否统计每条规则的执行次数、命中次数和耗时（会变慢）
+        :param rule_timeout: 单条正则规则处理单个文件名的耗时上限（秒），
+            超过时报告并在本次运行中停用该规则；None 表示不限制，统计模式下不生效
+        :param copier: 复制文件使用的 FileCopier（复制后端、块大小、保留的元数据），
+            None 表示默认设置：自动选择内核复制，保留时间戳和权限
+        :param file_filter: 遍历时使用的 FileFilter（包含 / 排除模式、扩展名、大小），
+            None 表示处理所有文件
+        :param memory_budget: 计划存储（已占用的目标名称、去重索引、延后执行的计划项）
+            的内存预算（字节），超过后转存到临时 SQLite 文件；None 表示全部留在内存
+        """
+        self.cache_size = cache_size
+        self.profile = profile
+        self.profiler = None
+        self.rule_timeout = rule_timeout
+        self.budget = None
+        self.copier = copier if copier is not None else FileCopier()
+        self.file_filter = file_filter
+        self.memory_budget = memory_budget
+        self._cache = None
         self.rules = []
-        self.stats = {"total": 0, "renamed": 0, "copied": 0, "errors": 0}
+        self.compiled_rules = []
+        self.rules_fingerprint = rules_fingerprint([])
+        self.stats = {
+            "total": 0,
+            "renamed": 0,
+            "copied": 0,
+            "errors": 0,
+            "fallback": 0,
+            "collisions": 0,
+            "skipped": 0,
+            "processed": 0,
+            "bytes": 0,
+            "timeouts": 0,
+            "duplicates": 0,
+            "saved_bytes": 0,
+            "filtered": 0,
+            "pruned": 0,
+        }
+        self._stats_lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._namespace = DestinationIndex()
+        self._made_dirs = set()
+        self._manifest = None
+        self._pool_window = 0
+        self.events = EventBus()
+
+    def subscribe(self, callback, level=FILE, batch_size=1, interval=0.0):
+        """
+        订阅处理进度事件，参数见 EventBus.subscribe
+
+        :param callback: 回调函数，每次收到一批 Event
+        :param level: SUMMARY / DIRECTORY / FILE
+        :return: 订阅句柄
+        """
+        return self.events.subscribe(callback, level, batch_size, interval)
+
+    def unsubscribe(self, subscription):
+        """取消订阅"""
+        self.events.unsubscribe(subscription)
 
     def set_rules(self, rules):
-        """设置重命名规则"""
+        """设置重命名规则，并编译为执行器"""
         self.rules = rules
 
+        # 加载器预构建的多模式匹配器，仅在仍与规则列表一致时使用
+        matcher = getattr(rules, "matcher", None)
+        if matcher is not None and (
+            len(matcher.rules) != len(rules)
+            or any(a is not b for a, b in zip(matcher.rules, rules))
+        ):
+            matcher = None
+
+        if self.profile:
+            # 逐条执行以便统计，结果与编译后的执行器一致
+            self.profiler = RuleProfiler(rules)
+            self.compiled_rules = [CompiledRule(list(rules), self.profiler.apply)]
+        else:
+            self.compiled_rules = RuleCompiler.compile(rules, matcher)
+
+            # 替换规则不会回溯，只给正则规则加耗时上限
+            self.budget = None
+            if self.rule_timeout:
+                self.budget = RuleBudget(self.rule_timeout, self._on_rule_timeout)
+                self.compiled_rules = [
+                    compiled
+                    if all(rule.rule_type == "simple" for rule in compiled.rules)
+                    else self.budget.wrap(compiled)
+                    for compiled in self.compiled_rules
+                ]
+        self.rules_fingerprint = rules_fingerprint(rules)
+
+        # 规则变化后旧的缓存结果全部作废
+        self._cache = None
+        if self.cache_size > 0:
+            self._cache = LRUCache(self.cache_size)
+
+    def _on_rule_timeout(self, overrun):
+        """规则超时：计数并报告"""
+        self._count("timeouts")
+        rule = overrun.rules[0]
+        number = next((i + 1 for i, r in enumerate(self.rules) if r is rule), "?")
+        action = "已中断" if overrun.interrupted else "耗时"
+        self.events.emit(
+            DIRECTORY,
+            "rule_timeout",
+            f" 规则 #{number} {rule.pattern.pattern} 处理 {overrun.filename} "
+            f"{action} {overrun.elapsed:.2f} 秒，超过上限，本次运行中已停用",
+            rule=rule,
+            filename=overrun.filename,
+        )
+
+    def cache_info(self):
+        """
+        文件名缓存的命中统计
+
+        :return: {"hits", "misses", "size", "maxsize"}，未启用缓存时返回 None
+        """
+        if self._cache is None:
+            return None
+        return self._cache.info()
+
+    def profile_report(self, sort_by="seconds"):
+        """
+        每条规则的统计，按 sort_by 从大到小排列
+
+        启用缓存时，命中缓存的文件名不会再执行规则，也不计入统计
+
+        :return: 列表，每项 {"index", "type", "pattern", "evaluations", "matches",
+            "changed", "seconds"}；未启用统计时返回 None
+        """
+        if self.profiler is None:
+            return None
+        return self.profiler.report(sort_by)
+
+    def print_profile(self, limit=20):
+        """打印规则耗时统计"""
+        if self.profiler is None:
+            return
+        print("\n".join(self.profiler.format_report(limit)))
+
     def apply_rules(self, filename):
         """
-        接收一个原始文件名，根据加载的规则列表，依次应用转换逻辑
+        接收一个原始文件名，依次调用编译好的规则执行器
+
+        启用缓存时复用之前的结果（缓存随 set_rules 重建，只对应当前规则）
 
         :param filename: 原始文件名（不含扩展名）
         :return: 处理后的新文件名
         """
-        new_filename = filename
+        if self._cache is None:
+            return self._run_rules(filename)
 
-        for rule in self.rules:
-            # 检查当前文件名是否匹配规则中的正则模式
-            match = rule.pattern.search(new_filename)
+        new_filename = self._cache.get(filename)
+        if new_filename is None:
+            new_filename = self._run_rules(filename)
+            self._cache.put(filename, new_filename)
+        return new_filename
 
-            # 查找替换
-            if rule.rule_type == "simple":
-                new_filename = rule.pattern.sub(rule.replacement, new_filename)
+    def apply_rules_batch(self, filenames):
+        """
+        一次处理一批文件名，结果与逐个调用 apply_rules 相同
 
-            # 正则替换
-            elif rule.rule_type == "regex":
-                converted_replacement = rule.replacement
-                # 兼容性处理
-                converted_replacement = re.sub(
-                    r"\$(\d+)", r"\\\1", converted_replacement
-                )
-                new_filename = rule.pattern.sub(converted_replacement, new_filename)
-
-            # 提取文件名中的数字并进行格式化
-            elif rule.rule_type == "extract_number" and match:
-                if match.groups():
-                    number_str = match.group(1)
-                    try:
-                        number = int(number_str)
-                        # 获取需要补零的位数 (例如 3 -> 001)
-                        digits = rule.metadata.get("digits", 1)
-                        formatted_number = str(number).zfill(digits)
-                        new_filename = formatted_number
-                    except ValueError:
-                        pass  # 转换失败，保持原名
-
-            # 提取特定文本并转换大小写
-            elif rule.rule_type == "extract_text" and match:
-                if match.groups():
-                    text = match.group(1)
-                    # 转大写
-                    if rule.metadata.get("uppercase"):
-                        text = text.upper()
-                    # 转小写
-                    elif rule.metadata.get("lowercase"):
-                        text = text.lower()
-                    new_filename = text
-
-            # 自定义格式
-            elif rule.rule_type == "custom_format" and match:
-                format_str = rule.metadata["format_str"]
-                format_params = rule.metadata.get("format_params", {})
-
-                # 替换占位符
-                result = format_str
-                for i, group in enumerate(match.groups(), 1):
-                    # 处理 \1, \2 等
-                    result = result.replace(f"\\{i}", group if group else "")
-
-                # 处理 {number}, {text} 等占位符
-                if "{number}" in result and match.groups():
-                    try:
-                        number = int(match.group(1))
-                        digits = format_params.get("number", 1)
-                        formatted_number = str(number).zfill(digits)
-                        result = result.replace("{number}", formatted_number)
-                    except (ValueError, IndexError):
-                        pass
-
-                if "{text}" in result and match.groups():
-                    try:
-                        text = match.group(1)
-                        result = result.replace("{text}", text)
-                    except IndexError:
-                        pass
-
-                new_filename = result
+        按规则逐条执行：带有必需字面量的规则先在整批文件名中查找该字面量，
+        只作用于包含它的文件名，几乎不命中的规则只需一次字符串查找
+
+        :param filenames: 原始文件名列表（不含扩展名）
+        :return: 新文件名列表，顺序与输入一致
+        """
+        # 批内重复的文件名只计算一次，缓存命中的直接取用
+        results = {}
+        pending = []
+        for filename in filenames:
+            if filename in results:
+                continue
+            cached = self._cache.get(filename) if self._cache is not None else None
+            results[filename] = cached
+            if cached is None:
+                pending.append(filename)
+
+        if pending:
+            for filename, new_filename in zip(
+                pending, apply_batch(self.compiled_rules, pending)
+            ):
+                results[filename] = new_filename
+                if self._cache is not None:
+                    self._cache.put(filename, new_filename)
+
+        return [results[filename] for filename in filenames]
+
+    def _run_rules(self, filename):
+        """依次调用编译好的规则执行器"""
+        new_filename = filename
+
+        for compiled in self.compiled_rules:
+            new_filename = compiled(new_filename)
 
         return new_filename
 
     def get_unique_filename(self, dest_dir, filename):
-        """处理文件名冲突"""
-        dest_path = os.path.join(dest_dir, filename)
+        """处理文件名冲突：由内存中的命名空间索引分配，不探测磁盘"""
+        return self._namespace.claim(dest_dir, filename)
+
+    def _count(self, key, amount=1):
+        """线程安全地累加统计项"""
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _on_filtered(self, kind):
+        """遍历时排除了一个文件（file）或剪掉了一个目录（dir）"""
+        self._count("filtered" if kind == "file" else "pruned")
+
+    def _scan(self, directory_path, output_dir):
+        """在后台线程遍历源目录，跳过输出目录和被过滤的文件、目录"""
+        file_filter = self.file_filter
+        if file_filter is not None and not file_filter.active:
+            file_filter = None
+        return background(
+            scan_tree(
+                directory_path,
+                skip_dirs=[output_dir],
+                file_filter=file_filter,
+                on_filtered=self._on_filtered,
+            )
+        )
+
+    def _new_store(self):
+        """为一次运行创建计划存储，超过内存预算时发出通知"""
+
+        def on_spill(path):
+            self.events.emit(
+                SUMMARY,
+                "spill",
+                f" 计划数据超过内存预算，转存到磁盘: {path}",
+                path=path,
+            )
+
+        return PlanStore(self.memory_budget, on_spill=on_spill)
+
+    def _finish_item(self, item):
+        """累加进度：已完成文件数与字节数"""
+        with self._stats_lock:
+            self.stats["processed"] += 1
+            self.stats["bytes"] += item.size
+
+    def progress(self):
+        """
+        当前进度快照，可在其他线程中轮询
+
+        :return: {"files": 已完成文件数, "bytes": 已完成字节数}
+        """
+        with self._stats_lock:
+            return {"files": self.stats["processed"], "bytes": self.stats["bytes"]}
+
+    def cancel(self):
+        """请求取消：正在处理的文件完成后停止，不再开始新的文件"""
+        self._cancel.set()
 
-        if not os.path.exists(dest_path):
-            return dest_path
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
 
-        name, ext = os.path.splitext(filename)
-        counter = 1
+    def _output_file(self, item, output_mode, overwrite=True, original=None):
+        """
+        执行阶段：按输出方式生成单个文件并记录结果
+
+        :param original: 内容相同的第一份文件（PlanItem），给出时硬链接到它已生成的目标，
+            链接失败时按输出方式从源文件生成
+        """
+        if self._cancel.is_set():
+            return
+
+        try:
+            dest_dir = os.path.dirname(item.dest)
+            if dest_dir not in self._made_dirs:
+                os.makedirs(dest_dir, exist_ok=True)
+                self._made_dirs.add(dest_dir)
+
+            if self._manifest is not None:
+                self._manifest.begin(item)
+
+            if original is not None and os.path.isfile(original.dest):
+                used_mode = materialize(
+                    original.dest, item.dest, "hardlink", overwrite, self.copier
+                )
+                if used_mode != "hardlink":
+                    self._count("fallback")
+            else:
+                used_mode = materialize(
+                    item.source, item.dest, output_mode, overwrite, self.copier
+                )
+                if used_mode != output_mode:
+                    self._count("fallback")
+
+            if self._manifest is not None:
+                self._manifest.complete(item, self.rules_fingerprint, output_mode)
+
+            if item.new_file != item.file:
+                self._count("renamed")
+            else:
+                self._count("copied")
+
+            if original is not None:
+                if self.events.wants(FILE):
+                    self.events.emit(
+                        FILE,
+                        "deduplicated",
+                        f"  去重: {item.relative_source}\n"
+                        f"  {os.path.basename(item.dest)} 链接到 {original.relative_source} 的输出",
+                        source=item.source,
+                        dest=item.dest,
+                        original=original.dest,
+                    )
+            elif item.new_file != item.file:
+                if self.events.wants(FILE):
+                    self.events.emit(
+                        FILE,
+                        "renamed",
+                        f" 重命名: {item.relative_source}\n"
+                        f"  {item.file} -> {os.path.basename(item.dest)}",
+                        source=item.source,
+                        dest=item.dest,
+                    )
+            else:
+                if self.events.wants(FILE):
+                    self.events.emit(
+                        FILE,
+                        "copied",
+                        f"  复制: {item.relative_source}",
+                        source=item.source,
+                        dest=item.dest,
+                    )
+
+        except Exception as e:
+            self._count("errors")
+            self.events.emit(
+                DIRECTORY,
+                "error",
+                f" 处理 {item.source} 时出错: {e}",
+                source=item.source,
+                error=e,
+            )
+
+        self._finish_item(item)
+
+    def _start_rule_pool(self, processes):
+        """
+        启动规则计算进程池，每个子进程持有自己编译的规则
 
-        while os.path.exists(dest_path):
-            new_filename = f"{name}_{counter}{ext}"
-            dest_path = os.path.join(dest_dir, new_filename)
-            counter += 1
+        统计模式下规则需要在本进程中执行，不启动进程池
 
-        return dest_path
+        :return: 进程池；processes <= 1 时返回 None
+        """
+        if processes <= 1 or self.profile:
+            return None
+        # 每个子进程保持两批在途，子进程不会空等
+        self._pool_window = processes * 2
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_rule_worker,
+            initargs=(list(self.rules), self.cache_size, self.rule_timeout),
+        )
+
+    def _rename_batches(self, entries, pool=None):
+        """
+        按批应用重命名规则
 
-    def process_files(self, directory_path, keep_structure, output_dir):
-        """处理所有文件"""
-        for root, dirs, files in os.walk(directory_path):
-            for file in files:
-                self.stats["total"] += 1
-                source_path = os.path.join(root, file)
+        有进程池时各批分发到子进程并行计算，结果按遍历顺序取回，
+        冲突处理仍在本进程按顺序进行，因此结果与进程数无关
 
-                # 分离文件名和扩展名
-                filename, extension = os.path.splitext(file)
+        :return: (FileEntry 列表, (名称, 扩展名) 列表, 新名称列表) 生成器
+        """
+        entries = iter(entries)
+
+        def batches():
+            while not self._cancel.is_set():
+                batch = list(itertools.islice(entries, PLAN_BATCH_SIZE))
+                if not batch:
+                    return
+                yield batch, [os.path.splitext(entry.name) for entry in batch]
+
+        if pool is None:
+            for batch, parts in batches():
+                yield batch, parts, self.apply_rules_batch([stem for stem, _ in parts])
+            return
 
-                # 应用重命名规则
-                new_filename = self.apply_rules(filename)
-                new_file = new_filename + extension
+        results = ordered_map(
+            pool,
+            _apply_rules_in_worker,
+            batches(),
+            self._pool_window,
+            lambda item: [stem for stem, _ in item[1]],
+        )
+        for (batch, parts), (new_stems, timeouts) in results:
+            if timeouts:
+                self._count("timeouts", timeouts)
+                self.events.emit(
+                    DIRECTORY,
+                    "rule_timeout",
+                    f" 规则计算子进程中有 {timeouts} 条规则超时，已在该子进程中停用",
+                )
+            yield batch, parts, new_stems
+
+    def plan_entries(self, entries, keep_structure, output_dir, pool=None):
+        """
+        规划阶段：对遍历得到的文件应用规则并确定目标路径
+
+        两种模式下重名都会加后缀，输出目录中的文件不会被覆盖
+
+        :param entries: FileEntry 迭代器
+        :param pool: 规则计算进程池，None 表示在本进程计算
+        :return: PlanItem 生成器
+        """
+        current_dir = None
+
+        for batch, parts, new_stems in self._rename_batches(entries, pool):
+            for entry, (_, extension), new_stem in zip(batch, parts, new_stems):
+                if self._cancel.is_set():
+                    return
+
+                self._count("total")
+
+                # 同一目录的文件是连续产出的
+                if entry.rel_dir != current_dir:
+                    current_dir = entry.rel_dir
+                    self.events.emit(
+                        DIRECTORY, "directory", f" 目录: {current_dir or '.'}", path=current_dir
+                    )
+
+                new_file = new_stem + extension
 
                 # 目标路径
-                if keep_structure:
-                    relative_path = os.path.relpath(root, directory_path)
-                    dest_dir = os.path.join(output_dir, relative_path)
-                    os.makedirs(dest_dir, exist_ok=True)
-                    dest_path = os.path.join(dest_dir, new_file)
+                if keep_structure and entry.rel_dir:
+                    dest_dir = os.path.join(output_dir, entry.rel_dir)
                 else:
-                    dest_path = self.get_unique_filename(output_dir, new_file)
+                    dest_dir = output_dir
+
+                dest_path = self.get_unique_filename(dest_dir, new_file)
+                if os.path.basename(dest_path) != new_file:
+                    self._count("collisions")
+
+                yield PlanItem(
+                    entry.path,
+                    entry.rel_path,
+                    dest_path,
+                    entry.name,
+                    new_file,
+                    entry.size,
+                    entry.mtime_ns,
+                )
+
+    def _emit_finish(self, message):
+        """发送结束事件，已取消时说明"""
+        if self._cancel.is_set():
+            self.events.emit(SUMMARY, "cancelled", " 已取消", stats=dict(self.stats))
+        else:
+            self.events.emit(SUMMARY, "finish", message, stats=dict(self.stats))
 
-                # 复制文件
-                try:
-                    shutil.copy2(source_path, dest_path)
+    def _skip_current(self, items, output_mode, index=None):
+        """
+        跳过清单中已完成且未变化的文件
+
+        :param index: 去重时的 DuplicateIndex；跳过的文件只按大小登记、不计算哈希，
+            本次出现同样大小的新文件时才比较，相同内容的新文件可以链接到它们已有的输出
+        """
+        for item in items:
+            if self._manifest.is_current(item, self.rules_fingerprint, output_mode):
+                self._count("skipped")
+                if index is not None:
+                    index.add_existing(item)
+                self._finish_item(item)
+                continue
+            yield item
+
+    def _dedupe_items(self, items, dedupe, index, store):
+        """
+        去重阶段：内容与之前某个文件完全相同的文件不再复制
 
-                    relative_source = os.path.relpath(source_path, directory_path)
-                    if new_file != file:
-                        self.stats["renamed"] += 1
-                        print(f" 重命名: {relative_source}")
-                        print(f"  {file} -> {os.path.basename(dest_path)}")
+        在规划线程中按遍历顺序判定，结果与线程数无关；
+        link 方式下重复文件放入计划存储的队列，等所有文件生成后再链接到第一份的输出
+
+        :param dedupe: "link" 硬链接到第一份 / "skip" 跳过并报告
+        :param index: DuplicateIndex，增量运行时已包含跳过的文件
+        :param store: 保存 (重复文件, 第一份) 队列的 PlanStore
+        """
+        for item in items:
+            original = index.find(item)
+            if original is None:
+                yield item
+                continue
+
+            self._count("duplicates")
+            self._count("saved_bytes", item.size)
+            if dedupe == "link":
+                store.append(item, original)
+                continue
+
+            if self.events.wants(FILE):
+                self.events.emit(
+                    FILE,
+                    "duplicate",
+                    f"  跳过重复: {item.relative_source}\n"
+                    f"  与 {original.relative_source} 内容相同",
+                    source=item.source,
+                    original=original.source,
+                )
+            self._finish_item(item)
+
+    def process_files(
+        self,
+        directory_path,
+        keep_structure,
+        output_dir,
+        workers=1,
+        output_mode="copy",
+        incremental=False,
+        processes=1,
+        dedupe=None,
+    ):
+        """
+        处理所有文件
+
+        遍历 -> 规划 -> 执行 三个阶段流式衔接，阶段之间是有界队列：
+        遍历在后台线程进行，规划（含冲突处理）在当前线程按排序后的遍历顺序进行，
+        执行交给 workers 个线程，因此结果与线程数无关，内存占用与目录规模无关
+
+        :param workers: 并发复制的线程数
+        :param output_mode: 输出方式 copy / hardlink / reflink / symlink，
+            链接失败时回退为复制
+        :param incremental: 是否使用输出目录下的运行清单，跳过上次已完成且未变化的文件，
+            中断后再次运行会从中断处继续
+        :param processes: 规则计算进程数；大于 1 时遍历结果按批分发到子进程计算新名称，
+            绕开 GIL，冲突处理和文件操作仍在本进程，结果与进程数无关
+        :param dedupe: 内容去重方式 link / skip，None 表示不去重；
+            先按大小分组，只对大小相同的文件计算哈希。链接类输出方式本身不占空间，
+            只在 copy / reflink 下生效；增量运行时跳过的已完成文件也参与比较
+
+        已占用的目标名称、去重索引和延后链接的重复文件保存在计划存储（PlanStore）中，
+        超过 memory_budget 时转存到磁盘，内存占用不随目录规模增长
+        """
+        if output_mode not in OUTPUT_MODES:
+            raise ValueError(f"未知的输出方式: {output_mode}")
+        if dedupe is not None and dedupe not in DEDUPE_MODES:
+            raise ValueError(f"未知的去重方式: {dedupe}")
+        if output_mode not in ("copy", "reflink"):
+            dedupe = None
+
+        # 清单以绝对路径记录源文件
+        directory_path = os.path.abspath(directory_path)
+        output_dir = os.path.abspath(output_dir)
+
+        owned = None
+        if incremental:
+            self._manifest = RunManifest(output_dir)
+            owned = self._manifest.owned_destinations()
+
+        store = self._new_store()
+        self._namespace = DestinationIndex(owned=owned, store=store)
+        self._made_dirs = set()
+        self._cancel.clear()
+        self.events.emit(SUMMARY, "start", f" 开始处理: {directory_path}", path=directory_path)
+        pool = self._start_rule_pool(processes)
+
+        try:
+            # 输出目录位于源目录内部时，遍历时跳过它
+            entries = self._scan(directory_path, output_dir)
+            plans = self.plan_entries(entries, keep_structure, output_dir, pool)
+            index = DuplicateIndex(store=store) if dedupe is not None else None
+            if self._manifest is not None:
+                plans = self._skip_current(plans, output_mode, index)
+            if index is not None:
+                plans = self._dedupe_items(plans, dedupe, index, store)
+            run_stage(plans, lambda item: self._output_file(item, output_mode), workers)
+            # 第一份都已生成，再链接重复文件
+            run_stage(
+                store.drain(),
+                lambda pair: self._output_file(pair[0], output_mode, original=pair[1]),
+                workers,
+            )
+            self._emit_finish(f" 处理完成: {directory_path}")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            self.events.flush()
+            self._namespace.clear()
+            self._made_dirs = set()
+            if self._manifest is not None:
+                self._manifest.close()
+                self._manifest = None
+
+    def watch(
+        self,
+        directory_path,
+        keep_structure,
+        output_dir,
+        workers=1,
+        output_mode="copy",
+        settle=2.0,
+        interval=2.0,
+        backend="auto",
+    ):
+        """
+        监视模式：先补齐源目录中已有的文件，之后持续处理新出现或被修改的文件，直到 cancel()
+
+        始终使用输出目录下的运行清单：已完成且未变化的文件不会重新生成，
+        被修改的文件沿用上次的目标路径。每次只规划、生成发生变化的文件，
+        inotify 可用时没有新文件就不消耗 CPU
+
+        :param settle: 文件在这段时间（秒）内没有再变化才视为写完，避免处理写了一半的文件
+        :param interval: 轮询间隔（秒），只在 inotify 不可用时使用
+        :param backend: 监视方式 auto（优先 inotify）/ inotify / polling
+        """
+        directory_path = os.path.abspath(directory_path)
+        output_dir = os.path.abspath(output_dir)
+
+        # 先注册监视再补齐，补齐期间到达的文件不会漏掉；被排除的目录不监视
+        watcher = create_watcher(
+            directory_path, [output_dir], interval, backend, file_filter=self.file_filter
+        )
+        try:
+            self.process_files(
+                directory_path,
+                keep_structure,
+                output_dir,
+                workers=workers,
+                output_mode=output_mode,
+                incremental=True,
+            )
+            if self._cancel.is_set():
+                return
+            self._watch_loop(
+                watcher, directory_path, keep_structure, output_dir, workers, output_mode, settle
+            )
+        finally:
+            watcher.close()
+
+    def _watch_loop(
+        self, watcher, directory_path, keep_structure, output_dir, workers, output_mode, settle
+    ):
+        """监视模式的主循环：收集变化、防抖，把写完的文件交给规划和执行阶段"""
+        self._manifest = RunManifest(output_dir)
+        self._namespace = DestinationIndex(store=self._new_store())
+        self._made_dirs = set()
+        # 本次监视中生成过的 源文件 -> 目标路径
+        dests = {}
+        debouncer = Debouncer(settle)
+
+        kind = "inotify" if isinstance(watcher, InotifyWatcher) else "轮询"
+        self.events.emit(
+            SUMMARY, "watch", f" 开始监视: {directory_path}（{kind}）", path=directory_path
+        )
+        try:
+            while not self._cancel.is_set():
+                deadline = debouncer.next_deadline()
+                timeout = WATCH_POLL_SECONDS
+                if deadline is not None:
+                    timeout = min(max(deadline - time.monotonic(), 0), timeout)
+                debouncer.touch(watcher.poll(timeout))
+
+                ready = debouncer.ready()
+                if ready:
+                    self._process_changed(
+                        ready,
+                        directory_path,
+                        keep_structure,
+                        output_dir,
+                        workers,
+                        output_mode,
+                        dests,
+                    )
+                    self.events.flush()
+            self.events.emit(
+                SUMMARY, "finish", f" 停止监视: {directory_path}", stats=dict(self.stats)
+            )
+        finally:
+            self.events.flush()
+            self._namespace.clear()
+            self._made_dirs = set()
+            self._manifest.close()
+            self._manifest = None
+
+    def _process_changed(
+        self, paths, directory_path, keep_structure, output_dir, workers, output_mode, dests
+    ):
+        """处理一批发生变化的文件"""
+        file_filter = self.file_filter
+        if file_filter is not None and not file_filter.active:
+            file_filter = None
+        entries = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            rel_path = os.path.relpath(path, directory_path)
+            if file_filter is not None and not file_filter.accepts_path(rel_path, st.st_size):
+                self._count("filtered")
+                continue
+            rel_dir, name = os.path.split(rel_path)
+            entries.append(FileEntry(path, rel_dir, name, st.st_size, st.st_mtime_ns))
+
+            # 处理过的文件释放原来的目标名称，重新规划时沿用它
+            previous = dests.get(path) or self._manifest.destination(path)
+            if previous is not None:
+                self._namespace.release(previous)
+
+        if not entries:
+            return
+        # 与完整运行的顺序一致：同一目录的文件连续、按名称排序
+        entries.sort(key=lambda entry: (entry.rel_dir, entry.name))
+        self.events.emit(
+            SUMMARY, "changed", f" 发现 {len(entries)} 个新文件或修改过的文件", count=len(entries)
+        )
+
+        def remember(items):
+            for item in items:
+                dests[item.source] = item.dest
+                yield item
+
+        plans = remember(self.plan_entries(entries, keep_structure, output_dir))
+        plans = self._skip_current(plans, output_mode)
+        run_stage(plans, lambda item: self._output_file(item, output_mode), workers)
+
+    def plan(self, directory_path, keep_structure, output_dir, plan_path, processes=1):
+        """
+        只生成重命名计划，不读写任何文件内容
+
+        遍历目录并应用规则，把 源路径 -> 目标路径 的映射流式写入计划文件；
+        冲突只在本次计划内部检测，不读取输出目录
+
+        :param plan_path: 计划文件路径，.csv 结尾写 CSV，否则写 JSONL
+        :param processes: 规则计算进程数，见 process_files
+        :return: 统计信息 {"total", "renamed", "unchanged", "collisions", "filtered"}
+        """
+        # 计划文件记录绝对路径，换一个工作目录或进程执行计划时仍然有效
+        directory_path = os.path.abspath(directory_path)
+        output_dir = os.path.abspath(output_dir)
+
+        report = {"total": 0, "renamed": 0, "unchanged": 0, "collisions": 0, "filtered": 0}
+        collisions_before = self.stats["collisions"]
+        filtered_before = self.stats["filtered"]
+        self._cancel.clear()
+        self._namespace = DestinationIndex(probe=False, store=self._new_store())
+        pool = self._start_rule_pool(processes)
+
+        try:
+            entries = self._scan(directory_path, output_dir)
+            with PlanWriter(plan_path) as writer:
+                for item in self.plan_entries(entries, keep_structure, output_dir, pool):
+                    writer.write(item)
+                    report["total"] += 1
+                    if item.new_file != item.file:
+                        report["renamed"] += 1
                     else:
-                        self.stats["copied"] += 1
-                        print(f"  复制: {relative_source}")
+                        report["unchanged"] += 1
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            self._namespace.clear()
 
-                except Exception as e:
-                    self.stats["errors"] += 1
-                    print(f" 处理 {source_path} 时出错: {e}")
+        report["collisions"] = self.stats["collisions"] - collisions_before
+        report["filtered"] = self.stats["filtered"] - filtered_before
+        return report
+
+    def apply_plan(self, plan_path, workers=1, output_mode="copy"):
+        """
+        执行已保存的重命名计划，不再重新计算规则
 
-    def print_stats(self, output_dir):
+        计划中的目标路径若已存在，视为错误并跳过，不会覆盖
+
+        :param plan_path: plan() 生成的计划文件
+        :param workers: 并发复制的线程数
+        :param output_mode: 输出方式
+        """
+        if output_mode not in OUTPUT_MODES:
+            raise ValueError(f"未知的输出方式: {output_mode}")
+
+        def counted(items):
+            for item in items:
+                if self._cancel.is_set():
+                    break
+                self._count("total")
+                yield item
+
+        self._made_dirs = set()
+        self._cancel.clear()
+        self.events.emit(SUMMARY, "start", f" 开始执行计划: {plan_path}", path=plan_path)
+        try:
+            run_stage(
+                counted(read_plan(plan_path)),
+                lambda item: self._output_file(item, output_mode, overwrite=False),
+                workers,
+            )
+            self._emit_finish(f" 计划执行完成: {plan_path}")
+        finally:
+            self.events.flush()
+            self._made_dirs = set()
+
+    def print_stats(self, output_dir=None):
         """打印统计信息"""
         print("\n" + "=" * 60)
-        print("处理完成！")
+        print("已取消！" if self.cancelled else "处理完成！")
         print(f"总文件数:     {self.stats['total']}")
         print(f"重命名文件数: {self.stats['renamed']}")
         print(f"仅复制文件数: {self.stats['copied']}")
         print(f"错误数:       {self.stats['errors']}")
-        print(f"输出目录:     {output_dir}")
+        if self.stats["fallback"]:
+            print(f"回退为复制:   {self.stats['fallback']}")
+        if self.stats["collisions"]:
+            print(f"重名冲突数:   {self.stats['collisions']}")
+        if self.stats["skipped"]:
+            print(f"未变化跳过:   {self.stats['skipped']}")
+        if self.stats["filtered"]:
+            print(f"过滤文件数:   {self.stats['filtered']}")
+        if self.stats["pruned"]:
+            print(f"跳过目录数:   {self.stats['pruned']}")
+        if self.stats["timeouts"]:
+            print(f"超时停用规则: {self.stats['timeouts']}")
+        if self.stats["duplicates"]:
+            print(
+                f"重复文件数:   {self.stats['duplicates']}"
+                f" (节省 {self.stats['saved_bytes'] / (1024 * 1024):.1f} MB)"
+            )
+        if self.copier.used:
+            print(f"复制方式:     {self.copier.report()}")
+        cache = self.cache_info()
+        if cache and cache["hits"] + cache["misses"]:
+            print(
+                f"文件名缓存:   命中 {cache['hits']} / 未命中 {cache['misses']}"
+                f" (容量 {cache['size']}/{cache['maxsize']})"
+            )
+        if output_dir:
+            print(f"输出目录:     {output_dir}")
         print("=" * 60)
 
+        if self.profiler is not None:
+            self.print_profile()
+            print("=" * 60)
+
+
+# 规则计算子进程中的重命名器
+_worker_renamer = None
+
+
+def _init_rule_worker(rules, cache_size, rule_timeout):
+    """子进程初始化：编译一次规则，之后的每批文件名都复用"""
+    global _worker_renamer
+    _worker_renamer = FileRenamer(cache_size=cache_size, rule_timeout=rule_timeout)
+    _worker_renamer.set_rules(rules)
+
+
+def _apply_rules_in_worker(stems):
+    """子进程中计算一批新名称，返回 (新名称列表, 本批新增的规则超时次数)"""
+    timeouts = _worker_renamer.stats["timeouts"]
+    new_stems = _worker_renamer.apply_rules_batch(stems)
+    return new_stems, _worker_renamer.stats["timeouts"] - timeouts
+
 
 def create_sample_files(script_dir):
     """创建示例配置文件"""
@@ -190,6 +930,7 @@ photo：照片
 
 # 提取数字规则（运行时会询问格式化位数）
 # 示例: "File - 1.txt" 提取数字 1，如果设置2位数 -> "01.txt"
+# 开头的 .* 用来取最后一处数字；首次加载时可能提示它在超长文件名上较慢，可以忽略
 .*\s*-\s*(\d+).* ==> {number}
 
 # 提取文本规则（运行时会询问是否转换大小写）
@@ -252,28 +993,181 @@ def display_menu():
     print("请选择重命名模式:")
     print("1. 简单替换模式 (words.txt)")
     print("2. 正则表达式模式 (regex_rules.txt)")
+    print("3. 执行已保存的重命名计划")
     print("0. 创建示例配置文件并退出")
     print("=" * 60)
 
 
+def ask_yes_no(prompt):
+    """询问 y/n"""
+    while True:
+        choice = input(prompt).strip().lower()
+        if choice in ["y", "n", "yes", "no"]:
+            return choice in ["y", "yes"]
+        print("请输入 y 或 n")
+
+
+def ask_workers():
+    """询问并发复制线程数"""
+    while True:
+        choice = input("并发复制线程数 (直接回车默认 1): ").strip()
+        if not choice:
+            return 1
+        if choice.isdigit() and int(choice) > 0:
+            return int(choice)
+        print("请输入大于0的数字")
+
+
+def ask_processes():
+    """询问规则计算进程数"""
+    cpus = os.cpu_count() or 1
+    while True:
+        choice = input(
+            f"规则计算进程数 (本机 {cpus} 核，规则多且文件多时可加大，直接回车默认 1): "
+        ).strip()
+        if not choice:
+            return 1
+        if choice.isdigit() and int(choice) > 0:
+            return int(choice)
+        print("请输入大于0的数字")
+
+
+def ask_rule_timeout():
+    """询问单条正则规则的耗时上限"""
+    while True:
+        choice = input("单条规则处理一个文件名的耗时上限，秒 (直接回车不限制): ").strip()
+        if not choice:
+            return None
+        try:
+            seconds = float(choice)
+        except ValueError:
+            seconds = 0
+        if seconds > 0:
+            return seconds
+        print("请输入大于0的数字")
+
+
+def ask_dedupe():
+    """询问内容去重方式"""
+    if not ask_yes_no("是否对内容完全相同的文件去重？(y/n): "):
+        return None
+    modes = list(DEDUPE_MODES)
+    for index, name in enumerate(modes, 1):
+        print(f"{index}. {DEDUPE_MODES[name]} ({name})")
+    while True:
+        choice = input("请选择去重方式 (直接回车默认 1): ").strip()
+        if not choice:
+            return modes[0]
+        if choice.isdigit() and 1 <= int(choice) <= len(modes):
+            return modes[int(choice) - 1]
+        print(f"请输入 1-{len(modes)}")
+
+
+def ask_preserve():
+    """询问复制时保留的元数据"""
+    print("\n复制时保留的元数据:")
+    options = list(PRESERVE_OPTIONS)
+    for index, name in enumerate(options, 1):
+        print(f"{index}. {PRESERVE_OPTIONS[name]} ({name})")
+    while True:
+        choice = input("请选择 (直接回车默认 1): ").strip()
+        if not choice:
+            return options[0]
+        if choice.isdigit() and 1 <= int(choice) <= len(options):
+            return options[int(choice) - 1]
+        print(f"请输入 1-{len(options)}")
+
+
+def ask_filter():
+    """询问文件过滤条件，不过滤时返回 None"""
+    if not ask_yes_no("是否只处理部分文件（按名称、扩展名或大小过滤）？(y/n): "):
+        return None
+    print("多个模式用空格或逗号分隔；以 / 结尾的排除模式表示目录，re: 开头表示正则")
+    include = split_patterns(input("只处理匹配的文件 (如 *.jpg IMG_*，直接回车不限): "))
+    exclude = split_patterns(input("排除 (如 .git/ *.tmp，直接回车不排除): "))
+    extensions = split_patterns(input("只处理这些扩展名 (如 jpg png，直接回车不限): "))
+
+    sizes = []
+    for prompt in ("最小文件大小 (如 10K、1M，直接回车不限): ", "最大文件大小 (直接回车不限): "):
+        while True:
+            text = input(prompt).strip()
+            if not text:
+                sizes.append(None)
+                break
+            try:
+                sizes.append(parse_size(text))
+                break
+            except ValueError as e:
+                print(e)
+
+    try:
+        return FileFilter(
+            include=include,
+            exclude=exclude,
+            extensions=extensions,
+            min_size=sizes[0],
+            max_size=sizes[1],
+        )
+    except re.error as e:
+        print(f" 错误: 无效的过滤正则，不过滤: {e}")
+        return None
+
+
+def ask_output_mode():
+    """询问输出方式"""
+    print("\n输出方式:")
+    modes = list(OUTPUT_MODES)
+    for index, name in enumerate(modes, 1):
+        print(f"{index}. {OUTPUT_MODES[name]} ({name})")
+    while True:
+        choice = input("请选择输出方式 (直接回车默认 1): ").strip()
+        if not choice:
+            return "copy"
+        if choice.isdigit() and 1 <= int(choice) <= len(modes):
+            return modes[int(choice) - 1]
+        print(f"请输入 1-{len(modes)}")
+
+
+def run_saved_plan():
+    """执行已保存的重命名计划"""
+    plan_path = input("请输入计划文件路径: ").strip()
+    if not os.path.isfile(plan_path):
+        print(f" 错误: 找不到计划文件")
+        return
+
+    workers = ask_workers()
+    output_mode = ask_output_mode()
+
+    print("\n开始执行计划...\n")
+    renamer = FileRenamer()
+    renamer.subscribe(print_events, FILE, batch_size=256, interval=0.2)
+    renamer.apply_plan(plan_path, workers=workers, output_mode=output_mode)
+    renamer.print_stats()
+
+
 def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
 
     display_menu()
 
-    mode = input("请选择模式 (0-2): ").strip()
+    mode = input("请选择模式 (0-3): ").strip()
 
     if mode == "0":
         create_sample_files(script_dir)
         print("\n示例文件已创建，请编辑配置文件后重新运行程序。")
         return
 
+    if mode == "3":
+        run_saved_plan()
+        return
+
     # 创建规则加载器
     rule_loader = RuleLoader(script_dir)
 
     # 根据模式加载规则
     print("\n加载规则...")
     rules = []
+    rule_timeout = None
 
     if mode == "1":
         rules = rule_loader.load_simple_rules()
@@ -283,14 +1177,23 @@ def main():
         rules = rule_loader.load_regex_rules(interactive=True)
         if not rules:
             return
+        rule_timeout = ask_rule_timeout()
     else:
         print(" 无效的选择")
         return
 
+    # 规则较多时可以统计每条规则的耗时，找出慢规则和从未命中的规则
+    profile = ask_yes_no("是否统计每条规则的耗时和命中次数（处理会变慢）？(y/n): ")
+
     # 创建重命名器实例并设置规则
-    renamer = FileRenamer()
+    renamer = FileRenamer(
+        cache_size=DEFAULT_CACHE_SIZE, profile=profile, rule_timeout=rule_timeout
+    )
     renamer.set_rules(rules)
 
+    # 控制台输出：批量打印，减少大目录下的输出开销
+    renamer.subscribe(print_events, FILE, batch_size=256, interval=0.2)
+
     # 获取输入目录
     print()
     directory_path = input("请输入需要处理的目录的绝对路径: ").strip()
@@ -300,27 +1203,113 @@ def main():
         return
 
     # 询问是否保持目录结构
-    while True:
-        choice = input("是否保持原文件夹结构？(y/n): ").strip().lower()
-        if choice in ["y", "n", "yes", "no"]:
-            keep_structure = choice in ["y", "yes"]
-            break
-        else:
-            print("请输入 y 或 n")
+    keep_structure = ask_yes_no("是否保持原文件夹结构？(y/n): ")
+
+    # 被排除的目录在遍历时整棵跳过
+    renamer.file_filter = ask_filter()
+
+    # 仅生成计划时不复制任何文件
+    plan_only = ask_yes_no("是否只生成重命名计划而不复制文件？(y/n): ")
+
+    # 监视模式：处理完已有文件后继续处理新到达的文件；
+    # 新文件逐个到达，不使用多进程计算规则，也不去重，因此不再询问这两项
+    watch = not plan_only and ask_yes_no(
+        "是否在处理完成后持续监视源目录，新文件写完即处理（Ctrl+C 停止）？(y/n): "
+    )
+
+    processes = 1 if watch else ask_processes()
+
+    if not plan_only:
+        workers = ask_workers()
+        output_mode = ask_output_mode()
+        # 链接类输出本身不占空间，只有复制和克隆需要去重
+        dedupe = ask_dedupe() if output_mode in ("copy", "reflink") and not watch else None
+        if output_mode == "copy":
+            renamer.copier = FileCopier(preserve=ask_preserve())
+
+    # 输出目录，链接模式需要与源目录在同一文件系统
+    output_dir = input("输出目录 (直接回车默认为脚本目录下的 output): ").strip()
+    if not output_dir:
+        output_dir = os.path.join(script_dir, "output")
+
+    # 输出目录不能是源目录本身或其上级，否则清空时会删掉源文件
+    source_abs = os.path.abspath(directory_path)
+    output_abs = os.path.abspath(output_dir)
+    if contains_path(output_abs, source_abs):
+        print(f" 错误: 输出目录不能是源目录或其上级目录")
+        return
+
+    if plan_only:
+        plan_path = input(
+            "计划文件路径 (.jsonl 或 .csv，直接回车默认为脚本目录下的 rename_plan.jsonl): "
+        ).strip()
+        if not plan_path:
+            plan_path = os.path.join(script_dir, "rename_plan.jsonl")
+
+        print("\n开始生成计划...\n")
+        report = renamer.plan(
+            directory_path, keep_structure, output_abs, plan_path, processes=processes
+        )
+
+        print("=" * 60)
+        print("计划已生成！")
+        print(f"总文件数:     {report['total']}")
+        print(f"将重命名:     {report['renamed']}")
+        print(f"名称不变:     {report['unchanged']}")
+        print(f"重名冲突数:   {report['collisions']}")
+        if report["filtered"]:
+            print(f"过滤文件数:   {report['filtered']}")
+        print(f"计划文件:     {plan_path}")
+        print("=" * 60)
+        if profile:
+            renamer.print_profile()
+            print("=" * 60)
+        return
 
     # 创建输出目录
-    output_dir = os.path.join(script_dir, "output")
     if os.path.exists(output_dir):
-        choice = input(f"\noutput目录已存在，是否清空？(y/n): ").strip().lower()
+        choice = input(f"\n{output_dir} 已存在，是否清空？(y/n): ").strip().lower()
         if choice in ["y", "yes"]:
-            shutil.rmtree(output_dir)
-            os.makedirs(output_dir)
+            if can_clear(output_dir, directory_path):
+                shutil.rmtree(output_dir)
+                os.makedirs(output_dir)
+            else:
+                print(f" 不能清空根目录或源目录的上级目录，保留已有文件")
     else:
         os.makedirs(output_dir)
 
+    if watch:
+        print("\n开始处理文件...\n")
+        try:
+            renamer.watch(
+                directory_path,
+                keep_structure,
+                output_dir,
+                workers=workers,
+                output_mode=output_mode,
+            )
+        except KeyboardInterrupt:
+            renamer.cancel()
+        renamer.print_stats(output_dir)
+        return
+
+    # 增量运行：记录已完成的文件，再次运行时跳过未变化的文件
+    incremental = ask_yes_no(
+        "是否启用增量运行（跳过上次已完成且未变化的文件，可从中断处继续）？(y/n): "
+    )
+
     # 开始处理
     print("\n开始处理文件...\n")
-    renamer.process_files(directory_path, keep_structure, output_dir)
+    renamer.process_files(
+        directory_path,
+        keep_structure,
+        output_dir,
+        workers=workers,
+        output_mode=output_mode,
+        incremental=incremental,
+        processes=processes,
+        dedupe=dedupe,
+    )
 
     # 显示统计
     renamer.print_stats(output_dir)
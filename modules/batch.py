@@ -0,0 +1,88 @@
+"""
+批量规则执行
+对一批文件名逐条规则执行：先用字面量在整批拼接后的文本中查找，
+只把规则交给可能命中的文件名，很少命中的规则几乎没有开销
+"""
+
+from bisect import bisect_right
+from typing import Iterable, List, Optional, Tuple
+from .matcher import fold_case
+
+
+# 拼接分隔符，文件名中不可能出现
+_SEPARATOR = "\0"
+
+
+class BatchBuffer:
+    """一批文件名，以及按需构建的拼接文本"""
+
+    def __init__(self, names: Iterable[str]):
+        self.names = list(names)
+        # 是否忽略大小写 -> (拼接文本, 每个文件名的起始位置)
+        self._joined = {}
+
+    def _index(self, ignore_case: bool) -> Tuple[str, List[int]]:
+        index = self._joined.get(ignore_case)
+        if index is None:
+            names = [fold_case(name) for name in self.names] if ignore_case else self.names
+            starts = []
+            position = 0
+            for name in names:
+                starts.append(position)
+                position += len(name) + 1
+            index = (_SEPARATOR.join(names), starts)
+            self._joined[ignore_case] = index
+        return index
+
+    def candidates(self, literal: str, ignore_case: bool = False) -> List[int]:
+        """
+        包含字面量的文件名序号
+
+        Args:
+            literal: 非空字面量
+            ignore_case: 是否忽略大小写（结果是 re.IGNORECASE 能匹配到的文件名的超集）
+        """
+        joined, starts = self._index(ignore_case)
+        if ignore_case:
+            literal = fold_case(literal)
+
+        hits = []
+        position = joined.find(literal)
+        while position != -1:
+            index = bisect_right(starts, position) - 1
+            hits.append(index)
+            # 同一个文件名只需要一次，直接跳到下一个文件名
+            if index + 1 >= len(starts):
+                break
+            position = joined.find(literal, starts[index + 1])
+        return hits
+
+    def update(self, index: int, name: str) -> None:
+        """更新一个文件名，拼接文本在下次查找时重建"""
+        if name != self.names[index]:
+            self.names[index] = name
+            self._joined.clear()
+
+
+def apply_batch(compiled_rules, names: Iterable[str]) -> List[str]:
+    """
+    对一批文件名依次执行编译好的规则，结果与逐个执行相同
+
+    Args:
+        compiled_rules: CompiledRule 列表；带有 literal 的执行器只作用于包含该字面量的文件名
+        names: 文件名（不含扩展名）
+
+    Returns:
+        新文件名列表，顺序与输入一致
+    """
+    buffer = BatchBuffer(names)
+    for compiled in compiled_rules:
+        literal: Optional[str] = compiled.literal
+        if literal is None:
+            indices = range(len(buffer.names))
+        else:
+            indices = buffer.candidates(literal, compiled.ignore_case)
+
+        for index in indices:
+            buffer.update(index, compiled(buffer.names[index]))
+    return buffer.names
@@ -0,0 +1,112 @@
+"""
+规则耗时上限
+单条规则处理一个文件名超过上限时报告并停用该规则，避免一条失控的正则拖住整个任务
+"""
+
+import contextlib
+import signal
+import threading
+import time
+from typing import Callable, List, Optional
+from .compiler import CompiledRule
+
+
+class RuleTimeout(Exception):
+    """规则执行超时"""
+
+
+def can_interrupt() -> bool:
+    """当前线程能否用 SIGALRM 中断正在运行的正则（仅 Unix 主线程）"""
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+@contextlib.contextmanager
+def time_limit(seconds: float):
+    """
+    限制代码块的耗时，超时抛出 RuleTimeout
+
+    只在 can_interrupt() 为真时生效，其他情况下不做任何限制
+    """
+    if not can_interrupt():
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise RuleTimeout()
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class BudgetOverrun:
+    """一次超时记录"""
+
+    __slots__ = ("rules", "filename", "elapsed", "interrupted")
+
+    def __init__(self, rules, filename: str, elapsed: float, interrupted: bool):
+        self.rules = rules
+        self.filename = filename
+        self.elapsed = elapsed
+        self.interrupted = interrupted
+
+
+class RuleBudget:
+    """
+    规则耗时上限
+
+    能中断时（Unix 主线程），超时的那次执行被中断，文件名按该规则未命中处理；
+    不能中断时（如 GUI 的工作线程），只能在执行结束后发现超时。
+    两种情况下该规则都会在本次运行余下的文件中停用
+    """
+
+    def __init__(
+        self, seconds: float, on_overrun: Optional[Callable[[BudgetOverrun], None]] = None
+    ):
+        """
+        Args:
+            seconds: 单条规则处理单个文件名的耗时上限（秒）
+            on_overrun: 超时回调
+        """
+        self.seconds = seconds
+        self.on_overrun = on_overrun
+        self.overruns: List[BudgetOverrun] = []
+
+    def wrap(self, compiled: CompiledRule) -> CompiledRule:
+        """给执行器加上耗时上限，字面量预筛选信息保持不变"""
+        func = compiled.func
+        seconds = self.seconds
+        clock = time.perf_counter
+        disabled = False
+
+        def limited(name: str) -> str:
+            nonlocal disabled
+            if disabled:
+                return name
+
+            start = clock()
+            try:
+                with time_limit(seconds):
+                    new_name = func(name)
+            except RuleTimeout:
+                disabled = True
+                self._report(compiled, name, clock() - start, True)
+                return name
+
+            elapsed = clock() - start
+            if elapsed > seconds:
+                disabled = True
+                self._report(compiled, name, elapsed, False)
+            return new_name
+
+        return CompiledRule(compiled.rules, limited, compiled.literal, compiled.ignore_case)
+
+    def _report(self, compiled: CompiledRule, name: str, elapsed: float, interrupted: bool):
+        overrun = BudgetOverrun(compiled.rules, name, elapsed, interrupted)
+        self.overruns.append(overrun)
+        if self.on_overrun is not None:
+            self.on_overrun(overrun)
@@ -0,0 +1,52 @@
+"""
+文件名缓存
+有界 LRU 缓存，支持单个查询和批量查询后回填
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class LRUCache:
+    """最近最少使用缓存"""
+
+    def __init__(self, maxsize: int):
+        """
+        Args:
+            maxsize: 最多保存的条目数
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """查询，命中时把条目移到最近使用的位置；未命中返回 None"""
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        """写入，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def info(self) -> Dict[str, int]:
+        """命中统计 {"hits", "misses", "size", "maxsize"}"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,285 @@
+"""
+规则编译器
+把加载并配置好的 Rule 转换为可直接调用的执行器
+"""
+
+import re
+from typing import Callable, List, Optional
+from .types import Rule
+from .matcher import MultiPatternMatcher, fold_case
+from .literal import required_literal
+
+
+# 自定义格式中的占位符：\1 ~ \9、{number}、{text}
+_FORMAT_TOKEN = re.compile(r"\\([1-9])|\{number\}|\{text\}")
+
+
+class CompiledRule:
+    """编译后的规则执行器"""
+
+    def __init__(
+        self,
+        rules: List[Rule],
+        func: Callable[[str], str],
+        literal: Optional[str] = None,
+        ignore_case: bool = False,
+    ):
+        """
+        Args:
+            rules: 该执行器覆盖的原始规则（连续的替换规则会合并为一个执行器）
+            func: 接收文件名、返回新文件名的函数
+            literal: 规则命中时文件名必然包含的字面量，批量执行时用于预筛选
+            ignore_case: 字面量是否忽略大小写比较
+        """
+        self.rules = rules
+        self.func = func
+        self.literal = literal or None
+        self.ignore_case = ignore_case
+
+    def __call__(self, filename: str) -> str:
+        return self.func(filename)
+
+    def __repr__(self):
+        return f"CompiledRule(rules={self.rules})"
+
+
+class RuleCompiler:
+    """规则编译器"""
+
+    @staticmethod
+    def compile(
+        rules: List[Rule], matcher: Optional[MultiPatternMatcher] = None
+    ) -> List[CompiledRule]:
+        """
+        编译规则列表
+
+        必须在 InteractiveConfigurator.configure 之后调用，
+        metadata 中的参数会在编译时固化
+
+        Args:
+            rules: 规则列表
+            matcher: 加载器预构建的多模式匹配器（覆盖全部规则时直接复用）
+
+        Returns:
+            执行器列表，按顺序依次调用即可
+        """
+        if matcher is not None and matcher.rules == list(rules):
+            return [CompiledRule(list(rules), matcher.apply)]
+
+        compiled = []
+        simple_run = []
+
+        for rule in rules:
+            if rule.rule_type == "simple":
+                simple_run.append(rule)
+                continue
+
+            if simple_run:
+                compiled.append(RuleCompiler._compile_simple(simple_run))
+                simple_run = []
+
+            func = RuleCompiler._compile_rule(rule)
+            if func is not None:
+                compiled.append(RuleCompiler._with_literal(rule, func))
+
+        if simple_run:
+            compiled.append(RuleCompiler._compile_simple(simple_run))
+
+        return compiled
+
+    @staticmethod
+    def compile_single(rule: Rule) -> CompiledRule:
+        """
+        单独编译一条规则，不与相邻规则合并（用于逐条统计）
+
+        Args:
+            rule: 规则
+
+        Returns:
+            执行器；规则不可能改变文件名时，执行器原样返回文件名
+        """
+        if rule.rule_type == "simple":
+            return RuleCompiler._compile_simple([rule])
+
+        func = RuleCompiler._compile_rule(rule)
+        if func is None:
+            return CompiledRule([rule], lambda name: name)
+        return RuleCompiler._with_literal(rule, func)
+
+    @staticmethod
+    def _with_literal(rule: Rule, func: Callable[[str], str]) -> CompiledRule:
+        """
+        包装单条规则的执行器，附上必需字面量
+
+        文件名中不含该字面量时规则不可能命中，直接返回原名而不运行正则
+        """
+        if "literal" in rule.metadata:
+            literal = rule.metadata["literal"]
+        else:
+            literal = required_literal(rule.pattern)
+        ignore_case = bool(rule.pattern.flags & re.IGNORECASE)
+
+        if not literal:
+            return CompiledRule([rule], func)
+
+        if ignore_case:
+            folded = fold_case(literal)
+
+            def guarded(name: str) -> str:
+                return func(name) if folded in fold_case(name) else name
+
+        else:
+
+            def guarded(name: str) -> str:
+                return func(name) if literal in name else name
+
+        return CompiledRule([rule], guarded, literal, ignore_case)
+
+    @staticmethod
+    def _compile_simple(rules: List[Rule]) -> CompiledRule:
+        """编译一段连续的替换规则"""
+        if len(rules) == 1:
+            sub = rules[0].pattern.sub
+            replacement = rules[0].replacement
+            literal = MultiPatternMatcher._literal(rules[0])
+            return CompiledRule(rules, lambda name: sub(replacement, name), literal, True)
+
+        return CompiledRule(rules, MultiPatternMatcher(rules).apply)
+
+    @staticmethod
+    def _compile_rule(rule: Rule) -> Optional[Callable[[str], str]]:
+        """
+        编译单条规则
+
+        Returns:
+            执行函数；规则不可能改变文件名时返回 None
+        """
+        if rule.rule_type == "regex":
+            return RuleCompiler._compile_regex(rule)
+
+        # 以下规则都依赖捕获组，没有捕获组时只有自定义格式会生效
+        if rule.rule_type == "extract_number":
+            if not rule.pattern.groups:
+                return None
+            return RuleCompiler._compile_extract_number(rule)
+
+        if rule.rule_type == "extract_text":
+            if not rule.pattern.groups:
+                return None
+            return RuleCompiler._compile_extract_text(rule)
+
+        if rule.rule_type == "custom_format":
+            return RuleCompiler._compile_custom_format(rule)
+
+        return None
+
+    @staticmethod
+    def _compile_regex(rule: Rule) -> Callable[[str], str]:
+        """正则替换：$1 形式的引用只在编译时转换一次"""
+        sub = rule.pattern.sub
+        replacement = re.sub(r"\$(\d+)", r"\\\1", rule.replacement)
+        return lambda name: sub(replacement, name)
+
+    @staticmethod
+    def _compile_extract_number(rule: Rule) -> Callable[[str], str]:
+        """提取数字并补零"""
+        search = rule.pattern.search
+        digits = rule.metadata.get("digits", 1)
+
+        def extract_number(name: str) -> str:
+            match = search(name)
+            if match is None:
+                return name
+            try:
+                return str(int(match.group(1))).zfill(digits)
+            except ValueError:
+                return name  # 转换失败，保持原名
+
+        return extract_number
+
+    @staticmethod
+    def _compile_extract_text(rule: Rule) -> Callable[[str], str]:
+        """提取文本并转换大小写"""
+        search = rule.pattern.search
+
+        if rule.metadata.get("uppercase"):
+            convert = str.upper
+        elif rule.metadata.get("lowercase"):
+            convert = str.lower
+        else:
+            convert = None
+
+        def extract_text(name: str) -> str:
+            match = search(name)
+            if match is None:
+                return name
+            text = match.group(1)
+            return convert(text) if convert else text
+
+        return extract_text
+
+    @staticmethod
+    def _compile_custom_format(rule: Rule) -> Callable[[str], str]:
+        """
+        自定义格式：格式串在编译时拆分为片段
+
+        片段为字面量字符串或取值函数，运行时只需拼接
+        """
+        search = rule.pattern.search
+        format_str = rule.metadata["format_str"]
+        digits = rule.metadata.get("format_params", {}).get("number", 1)
+        group_count = rule.pattern.groups
+
+        def group_value(index):
+            return lambda match: match.group(index) or ""
+
+        def number_value(match):
+            try:
+                return str(int(match.group(1))).zfill(digits)
+            except (ValueError, TypeError):
+                return "{number}"
+
+        def text_value(match):
+            return match.group(1) or ""
+
+        parts = []
+        last = 0
+        for token in _FORMAT_TOKEN.finditer(format_str):
+            # 没有捕获组时占位符保持原样；\N 超出捕获组数量也保持原样
+            if not group_count:
+                continue
+            if token.group(1) and int(token.group(1)) > group_count:
+                continue
+
+            if token.start() > last:
+                parts.append(format_str[last : token.start()])
+
+            if token.group(1):
+                parts.append(group_value(int(token.group(1))))
+            elif token.group(0) == "{number}":
+                parts.append(number_value)
+            else:
+                parts.append(text_value)
+            last = token.end()
+
+        if last < len(format_str):
+            parts.append(format_str[last:])
+
+        # 纯字面量，匹配成功时直接返回
+        if all(isinstance(part, str) for part in parts):
+            constant = "".join(parts)
+
+            def custom_format_constant(name: str) -> str:
+                return constant if search(name) else name
+
+            return custom_format_constant
+
+        def custom_format(name: str) -> str:
+            match = search(name)
+            if match is None:
+                return name
+            return "".join(
+                part if isinstance(part, str) else part(match) for part in parts
+            )
+
+        return custom_format
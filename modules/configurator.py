@@ -103,3 +103,57 @@ class InteractiveConfigurator:
                         self.output_func("  请输入有效的数字")
 
         self.output_func(f"   已配置自定义格式规则")
+
+
+class PresetConfigurator(InteractiveConfigurator):
+    """
+    预设参数配置器
+
+    用预先给出的参数（如命令行参数）配置交互式规则，不询问用户，
+    适合无人值守运行；规则需要的参数没有给出时抛出 ValueError
+    """
+
+    def __init__(
+        self,
+        digits: Optional[int] = None,
+        uppercase: bool = False,
+        lowercase: bool = False,
+        output_func: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Args:
+            digits: 提取数字规则和 {number} 占位符的补零位数
+            uppercase: 提取文本规则是否转换为大写
+            lowercase: 提取文本规则是否转换为小写
+            output_func: 自定义输出函数，默认使用 print()
+        """
+        super().__init__(input_func=self._no_input, output_func=output_func)
+        self.digits = digits
+        self.uppercase = uppercase
+        self.lowercase = lowercase
+
+    @staticmethod
+    def _no_input(prompt: str) -> str:
+        raise ValueError(f"预设参数配置器不能询问: {prompt}")
+
+    def _require_digits(self, index: int, rule: Rule) -> int:
+        if self.digits is None:
+            raise ValueError(f"规则 #{index+1} {rule.pattern.pattern} 需要补零位数，但没有给出")
+        return self.digits
+
+    def _configure_extract_number(self, index: int, rule: Rule) -> None:
+        """配置提取数字规则"""
+        rule.metadata["digits"] = self._require_digits(index, rule)
+
+    def _configure_extract_text(self, index: int, rule: Rule) -> None:
+        """配置提取文本规则"""
+        rule.metadata["uppercase"] = self.uppercase
+        rule.metadata["lowercase"] = self.lowercase
+
+    def _configure_custom_format(self, index: int, rule: Rule) -> None:
+        """配置自定义格式规则"""
+        placeholders = re.findall(r"\{(\w+)(?::(\d+))?\}", rule.replacement)
+        for placeholder, width in placeholders:
+            if placeholder == "number" and not width:
+                format_params = rule.metadata.setdefault("format_params", {})
+                format_params[placeholder] = self._require_digits(index, rule)
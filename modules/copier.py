@@ -0,0 +1,254 @@
+"""
+文件复制
+优先使用内核复制（copy_file_range / sendfile），数据不经过用户态缓冲区；
+块大小可调，可选择保留哪些元数据
+"""
+
+import errno
+import os
+import shutil
+import stat
+import threading
+from typing import Dict
+
+
+# 复制后端
+COPY_BACKENDS = {
+    "auto": "自动选择",
+    "copy_file_range": "copy_file_range（内核复制，同一文件系统上可能直接共享数据块）",
+    "sendfile": "sendfile（内核复制）",
+    "buffered": "用户态缓冲区读写",
+    "shutil": "shutil.copy2（同时复制扩展属性）",
+}
+
+# 元数据保留方式
+PRESERVE_OPTIONS = {
+    "all": "时间戳和权限",
+    "times": "仅时间戳",
+    "mode": "仅权限",
+    "none": "不保留",
+}
+
+# 单次系统调用复制的字节数，也是用户态读写的缓冲区大小
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# 这些错误表示当前文件不能用该后端复制（跨文件系统、文件系统不支持等），换下一个后端重试
+_UNSUPPORTED = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EBADF,
+    errno.EOPNOTSUPP,
+    getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+    getattr(errno, "ENOTSOCK", errno.EINVAL),
+}
+
+# 自动选择时依次尝试的后端
+_AUTO_ORDER = ("copy_file_range", "sendfile", "buffered")
+
+# 能在打开的文件描述符上设置时间和权限时省去按路径查找；
+# 否则关闭文件后再按路径设置，避免关闭前的写入又改掉修改时间
+_METADATA_BY_FD = os.utime in os.supports_fd and os.chmod in os.supports_fd
+
+
+class _Unsupported(Exception):
+    """后端不能处理当前文件"""
+
+
+def _copy_file_range(src: int, dst: int, size: int, chunk_size: int) -> None:
+    offset = 0
+    while True:
+        try:
+            copied = os.copy_file_range(src, dst, chunk_size, offset, offset)
+        except OSError as e:
+            if e.errno in _UNSUPPORTED and offset == 0:
+                raise _Unsupported() from e
+            raise
+        if copied == 0:
+            # 有些虚拟文件系统报告大小却读不出数据，从头换后端
+            if offset == 0 and size > 0:
+                raise _Unsupported()
+            return
+        offset += copied
+
+
+def _sendfile(src: int, dst: int, size: int, chunk_size: int) -> None:
+    offset = 0
+    while True:
+        try:
+            sent = os.sendfile(dst, src, offset, chunk_size)
+        except OSError as e:
+            if e.errno in _UNSUPPORTED and offset == 0:
+                raise _Unsupported() from e
+            raise
+        if sent == 0:
+            if offset == 0 and size > 0:
+                raise _Unsupported()
+            return
+        offset += sent
+
+
+def _buffered(src: int, dst: int, size: int, chunk_size: int) -> None:
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(src, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+    buffer = bytearray(min(chunk_size, max(size, 1)))
+    view = memoryview(buffer)
+    with open(src, "rb", buffering=0, closefd=False) as reader:
+        while True:
+            read = reader.readinto(buffer)
+            if not read:
+                return
+            written = 0
+            while written < read:
+                written += os.write(dst, view[written:read])
+
+
+_BACKEND_FUNCS = {
+    "copy_file_range": _copy_file_range,
+    "sendfile": _sendfile,
+    "buffered": _buffered,
+}
+
+
+def available_backends():
+    """当前平台可用的后端"""
+    names = ["auto"]
+    if hasattr(os, "copy_file_range"):
+        names.append("copy_file_range")
+    if hasattr(os, "sendfile") and os.name == "posix":
+        names.append("sendfile")
+    names.extend(["buffered", "shutil"])
+    return names
+
+
+class FileCopier:
+    """
+    文件复制器
+
+    自动模式下依次尝试 copy_file_range、sendfile、用户态读写，
+    某个后端对当前文件不可用时从头换下一个；本机不支持的后端（ENOSYS）之后不再尝试。
+    可在多个线程中共用，used 记录每个后端实际复制的文件数
+    """
+
+    def __init__(
+        self,
+        backend: str = "auto",
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        preserve: str = "all",
+    ):
+        """
+        Args:
+            backend: 复制后端，见 COPY_BACKENDS；指定的后端不可用时回退为用户态读写
+            chunk_size: 单次系统调用复制的字节数
+            preserve: 保留的元数据，见 PRESERVE_OPTIONS；shutil 后端总是全部保留
+        """
+        if backend not in COPY_BACKENDS:
+            raise ValueError(f"未知的复制后端: {backend}")
+        if preserve not in PRESERVE_OPTIONS:
+            raise ValueError(f"未知的元数据保留方式: {preserve}")
+        if chunk_size <= 0:
+            raise ValueError("块大小必须大于 0")
+
+        self.backend = backend
+        self.chunk_size = chunk_size
+        self.preserve = preserve
+        self.used: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        if backend == "auto":
+            order = _AUTO_ORDER
+        elif backend == "shutil":
+            order = ()
+        else:
+            order = (backend, "buffered")
+        supported = set(available_backends())
+        self._order = [name for name in order if name in supported]
+
+    def _record(self, backend: str) -> None:
+        with self._lock:
+            self.used[backend] = self.used.get(backend, 0) + 1
+
+    def _disable(self, backend: str) -> None:
+        """本机内核不支持该调用，之后不再尝试"""
+        with self._lock:
+            if backend in self._order and backend != "buffered":
+                self._order = [name for name in self._order if name != backend]
+
+    def copy(self, source: str, dest: str) -> str:
+        """
+        复制单个文件，目标已存在时覆盖
+
+        Args:
+            source: 源文件路径
+            dest: 目标路径
+
+        Returns:
+            实际使用的后端
+        """
+        if not self._order:
+            shutil.copy2(source, dest)
+            self._record("shutil")
+            return "shutil"
+
+        src = os.open(source, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            info = os.fstat(src)
+            dst = os.open(
+                dest,
+                os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0),
+                0o666,
+            )
+            try:
+                backend = self._copy_data(src, dst, info.st_size)
+                if _METADATA_BY_FD:
+                    self._copy_metadata(dst, info)
+            finally:
+                os.close(dst)
+        finally:
+            os.close(src)
+        if not _METADATA_BY_FD:
+            self._copy_metadata(dest, info)
+
+        self._record(backend)
+        return backend
+
+    def _copy_data(self, src: int, dst: int, size: int) -> str:
+        for backend in list(self._order):
+            try:
+                _BACKEND_FUNCS[backend](src, dst, size, self.chunk_size)
+                return backend
+            except _Unsupported as e:
+                cause = e.__cause__
+                if isinstance(cause, OSError) and cause.errno == errno.ENOSYS:
+                    self._disable(backend)
+                # 换后端前清空目标，从头开始
+                os.ftruncate(dst, 0)
+                os.lseek(dst, 0, os.SEEK_SET)
+                os.lseek(src, 0, os.SEEK_SET)
+
+        _buffered(src, dst, size, self.chunk_size)
+        return "buffered"
+
+    def _copy_metadata(self, target, info: os.stat_result) -> None:
+        """
+        设置目标的时间和权限
+
+        与 shutil.copystat 一样先设时间再设权限，只读的权限不会挡住时间的设置
+
+        Args:
+            target: 打开的文件描述符或目标路径
+            info: 源文件的 stat 结果
+        """
+        if self.preserve in ("all", "times"):
+            os.utime(target, ns=(info.st_atime_ns, info.st_mtime_ns))
+        if self.preserve in ("all", "mode"):
+            os.chmod(target, stat.S_IMODE(info.st_mode))
+
+    def report(self) -> str:
+        """各后端复制的文件数，如 "copy_file_range 120 / buffered 3" """
+        with self._lock:
+            used = sorted(self.used.items(), key=lambda pair: -pair[1])
+        return " / ".join(f"{name} {count}" for name, count in used)
@@ -0,0 +1,139 @@
+"""
+内容去重
+先按文件大小分组，只有大小相同的文件才计算内容哈希，找出内容完全相同的文件
+"""
+
+import hashlib
+from typing import Optional
+
+from .pipeline import PlanItem
+from .plan_store import PlanStore
+
+
+# 去重方式
+DEDUPE_MODES = {
+    "link": "硬链接到第一份",
+    "skip": "跳过并报告",
+}
+
+# 计划存储中的表名
+_SIZES = "dedupe_sizes"
+_PENDING = "dedupe_pending"
+_DIGESTS = "dedupe_digests"
+
+_UNSEEN = object()
+
+# 读取文件计算哈希时的块大小
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    流式计算文件内容的哈希，内存占用与文件大小无关
+
+    Args:
+        path: 文件路径
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        十六进制摘要
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DuplicateIndex:
+    """
+    重复文件索引
+
+    按处理顺序登记文件，每种大小的第一个文件先不读取；
+    出现第二个同样大小的文件时才计算两者的哈希，大小唯一的文件永远不会被读取。
+    增量运行中跳过的文件用 add_existing 登记，只有出现同样大小的新文件时才计算哈希。
+    登记的文件以压缩形式保存在 PlanStore 中，超过内存预算时随之转存到磁盘
+    """
+
+    def __init__(self, min_size: int = 1, store: Optional[PlanStore] = None):
+        """
+        Args:
+            min_size: 小于该大小的文件不参与去重（空文件链接起来没有意义）
+            store: 保存索引的计划存储，默认为不限内存的新存储
+        """
+        self.min_size = min_size
+        self.store = store if store is not None else PlanStore()
+
+    def _register(self, item: PlanItem) -> Optional[PlanItem]:
+        """计算哈希并登记；已有相同内容的文件时返回那一份"""
+        digest = file_digest(item.source)
+        original = self.store.get(_DIGESTS, item.size, digest)
+        if original is None:
+            self.store.put(_DIGESTS, item.size, digest, self.store.pack(item))
+            return None
+        return self.store.unpack(original)
+
+    def _hash_pending(self, size: int, count: int) -> None:
+        """该大小出现需要比较的文件，计算之前暂存的文件的哈希；之后同样大小的文件直接计算"""
+        self.store.put(_SIZES, size, "", None)
+        for position in range(count):
+            key = str(position)
+            row = self.store.get(_PENDING, size, key)
+            self.store.remove(_PENDING, size, key)
+            try:
+                self._register(self.store.unpack(row))
+            except OSError:
+                pass
+
+    def add_existing(self, item: PlanItem) -> None:
+        """
+        登记一个不再处理的文件（增量运行中跳过的文件），之后内容相同的文件可以引用它
+
+        与 find 一样先不读取，只有出现同样大小的新文件时才计算哈希
+        """
+        if item.size < self.min_size:
+            return
+        # 该大小暂存了几个尚未计算哈希的文件；计算过之后记为 None
+        count = self.store.get(_SIZES, item.size, "", _UNSEEN)
+        if count is None:
+            try:
+                self._register(item)
+            except OSError:
+                pass
+            return
+        if count is _UNSEEN:
+            count = 0
+        self.store.put(_PENDING, item.size, str(count), self.store.pack(item))
+        self.store.put(_SIZES, item.size, "", count + 1)
+
+    def find(self, item: PlanItem) -> Optional[PlanItem]:
+        """
+        登记一个文件，返回内容相同的第一份文件
+
+        读取失败的文件视为不重复，交给后续阶段照常处理并报错
+
+        Args:
+            item: PlanItem（需要 source 和 size）
+
+        Returns:
+            之前登记过的内容相同的 PlanItem；没有时返回 None
+        """
+        if item.size < self.min_size:
+            return None
+
+        count = self.store.get(_SIZES, item.size, "", _UNSEEN)
+        if count is _UNSEEN:
+            self.store.put(_PENDING, item.size, "0", self.store.pack(item))
+            self.store.put(_SIZES, item.size, "", 1)
+            return None
+
+        if count is not None:
+            # 同样大小的文件到现在才需要计算哈希
+            self._hash_pending(item.size, count)
+        try:
+            return self._register(item)
+        except OSError:
+            return None
@@ -0,0 +1,157 @@
+"""
+进度事件
+FileRenamer 通过事件通知处理进度，订阅方按级别过滤，并可批量、限频接收
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# 事件级别，数值越大越详细；订阅某个级别会收到该级别及以下的所有事件
+SUMMARY = 1  # 开始、结束等汇总信息
+DIRECTORY = 2  # 进入目录、单个文件出错
+FILE = 3  # 每个文件的处理结果
+
+LEVEL_NAMES = {SUMMARY: "汇总", DIRECTORY: "目录", FILE: "文件"}
+
+
+class Event:
+    """进度事件"""
+
+    __slots__ = ("level", "kind", "message", "data")
+
+    def __init__(self, level: int, kind: str, message: str, data: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            level: 事件级别
+            kind: 事件类型，如 start / finish / directory / renamed / copied / error
+            message: 可直接显示的文本
+            data: 附加数据
+        """
+        self.level = level
+        self.kind = kind
+        self.message = message
+        self.data = data if data is not None else {}
+
+    def __repr__(self):
+        return f"Event({self.kind}, {self.message!r})"
+
+
+class Subscription:
+    """一个订阅者：缓冲事件，按批量大小或时间间隔交付"""
+
+    def __init__(
+        self,
+        callback: Callable[[List[Event]], None],
+        level: int,
+        batch_size: int,
+        interval: float,
+        max_pending: int,
+    ):
+        self.callback = callback
+        self.level = level
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending: List[Event] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def push(self, event: Event) -> None:
+        with self._lock:
+            if len(self._pending) >= self.max_pending and event.level > SUMMARY:
+                # 订阅方跟不上时丢弃详细事件，汇总事件始终保留
+                self.dropped += 1
+                return
+            self._pending.append(event)
+
+            if len(self._pending) < self.batch_size:
+                return
+            if self.interval and time.monotonic() - self._last_flush < self.interval:
+                return
+            batch = self._take()
+
+        self.callback(batch)
+
+    def _take(self) -> List[Event]:
+        """取出缓冲区（调用方持有锁）"""
+        batch = self._pending
+        self._pending = []
+        self._last_flush = time.monotonic()
+        if self.dropped:
+            batch.append(
+                Event(SUMMARY, "dropped", f" (有 {self.dropped} 条详细日志因输出过快被省略)")
+            )
+            self.dropped = 0
+        return batch
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending and not self.dropped:
+                return
+            batch = self._take()
+        self.callback(batch)
+
+
+class EventBus:
+    """事件总线"""
+
+    def __init__(self):
+        self._subscriptions: List[Subscription] = []
+        self._max_level = 0
+
+    def subscribe(
+        self,
+        callback: Callable[[List[Event]], None],
+        level: int = FILE,
+        batch_size: int = 1,
+        interval: float = 0.0,
+        max_pending: int = 10000,
+    ) -> Subscription:
+        """
+        订阅事件
+
+        Args:
+            callback: 回调函数，每次收到一批事件（列表）
+            level: 订阅的最详细级别
+            batch_size: 攒够多少条事件再交付
+            interval: 两次交付之间的最小间隔（秒），用于限频
+            max_pending: 缓冲上限，超出后丢弃详细事件并在下一批中说明
+
+        Returns:
+            订阅句柄，可用于 unsubscribe
+        """
+        subscription = Subscription(callback, level, batch_size, interval, max_pending)
+        self._subscriptions.append(subscription)
+        self._max_level = max(self._max_level, level)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """取消订阅，未交付的事件会先交付"""
+        subscription.flush()
+        self._subscriptions.remove(subscription)
+        self._max_level = max((s.level for s in self._subscriptions), default=0)
+
+    def wants(self, level: int) -> bool:
+        """是否有订阅者关心该级别，没有时调用方可以跳过格式化消息"""
+        return level <= self._max_level
+
+    def emit(self, level: int, kind: str, message: str, **data) -> None:
+        """发送事件"""
+        if level > self._max_level:
+            return
+        event = Event(level, kind, message, data)
+        for subscription in self._subscriptions:
+            if level <= subscription.level:
+                subscription.push(event)
+
+    def flush(self) -> None:
+        """交付所有订阅者缓冲中的事件"""
+        for subscription in self._subscriptions:
+            subscription.flush()
+
+
+def print_events(events: List[Event]) -> None:
+    """把一批事件打印到控制台（一次 print 调用）"""
+    print("\n".join(event.message for event in events))
@@ -0,0 +1,191 @@
+"""
+文件过滤
+按路径（glob 或正则）、扩展名和大小决定哪些文件参与处理；
+被排除的目录在遍历时直接剪掉，不会再列出其中的任何条目
+"""
+
+import fnmatch
+import os
+import re
+from typing import Iterable, List, Optional, Pattern
+
+
+# 正则模式的前缀，其余模式按 glob 处理
+REGEX_PREFIX = "re:"
+
+# 常见的不需要处理的文件和目录，供界面提示使用
+COMMON_EXCLUDES = (".git/", "__pycache__/", ".cache/", "Thumbs.db", ".DS_Store", "*.tmp", "~$*")
+
+# 大小单位
+_SIZE_UNITS = {"": 1, "B": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_size(text: str) -> int:
+    """
+    解析大小，支持 K / M / G / T 后缀（1024 进制），如 "10K"、"1.5M"
+
+    Raises:
+        ValueError: 格式不正确
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)I?B?\s*", text.upper())
+    if match is None:
+        raise ValueError(f"无效的大小: {text}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+def split_patterns(text: str) -> List[str]:
+    """把用空格或逗号分隔的模式拆成列表"""
+    return [part for part in re.split(r"[\s,，]+", text.strip()) if part]
+
+
+class _Matcher:
+    """
+    一组模式合并成的匹配器
+
+    不含 / 的 glob 匹配文件名，含 / 的 glob 匹配相对路径；
+    re: 开头的正则在相对路径中搜索。每组合并成一个正则，每个文件只匹配一次
+    """
+
+    def __init__(self, patterns: Iterable[str], ignore_case: bool):
+        name_globs, path_globs, regexes = [], [], []
+        for pattern in patterns:
+            if pattern.startswith(REGEX_PREFIX):
+                regexes.append(pattern[len(REGEX_PREFIX) :])
+            elif "/" in pattern:
+                path_globs.append(fnmatch.translate(pattern.lstrip("/")))
+            else:
+                name_globs.append(fnmatch.translate(pattern))
+
+        flags = re.IGNORECASE if ignore_case else 0
+        self._name = self._combine(name_globs, flags)
+        self._path = self._combine(path_globs, flags)
+        self._regex = self._combine(regexes, flags)
+        self.empty = not (name_globs or path_globs or regexes)
+
+    @staticmethod
+    def _combine(parts: List[str], flags: int) -> Optional[Pattern]:
+        if not parts:
+            return None
+        return re.compile("|".join(f"(?:{part})" for part in parts), flags)
+
+    def matches(self, name: str, rel_path: str) -> bool:
+        """rel_path 使用 / 分隔"""
+        return (
+            (self._name is not None and self._name.match(name) is not None)
+            or (self._path is not None and self._path.match(rel_path) is not None)
+            or (self._regex is not None and self._regex.search(rel_path) is not None)
+        )
+
+
+class FileFilter:
+    """
+    文件过滤器
+
+    判断顺序：目录排除（整棵子树剪掉）-> 文件排除 -> 扩展名 -> 包含模式 -> 大小；
+    大小最后判断，名称不符合的文件连 stat 都不需要
+    """
+
+    def __init__(
+        self,
+        include: Iterable[str] = (),
+        exclude: Iterable[str] = (),
+        exclude_dirs: Iterable[str] = (),
+        extensions: Iterable[str] = (),
+        exclude_extensions: Iterable[str] = (),
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        ignore_case: Optional[bool] = None,
+    ):
+        """
+        Args:
+            include: 只处理匹配其中任一模式的文件（glob，或 re: 开头的正则）
+            exclude: 排除匹配其中任一模式的文件；以 / 结尾的模式视为目录模式
+            exclude_dirs: 排除的目录模式，匹配目录名或相对路径，整棵子树不再遍历
+            extensions: 只处理这些扩展名，如 .jpg、png（不区分大小写）
+            exclude_extensions: 排除这些扩展名
+            min_size: 最小文件大小（字节）
+            max_size: 最大文件大小（字节）
+            ignore_case: 模式是否忽略大小写，默认按平台（Windows 忽略）
+        """
+        if ignore_case is None:
+            ignore_case = os.path.normcase("A") == "a"
+
+        exclude = list(exclude)
+        dir_patterns = [p.rstrip("/") for p in exclude_dirs]
+        dir_patterns += [p.rstrip("/") for p in exclude if p.endswith("/")]
+        file_patterns = [p for p in exclude if not p.endswith("/")]
+
+        self._include = _Matcher(include, ignore_case)
+        self._exclude = _Matcher(file_patterns, ignore_case)
+        self._exclude_dirs = _Matcher(dir_patterns, ignore_case)
+        self._extensions = self._normalize_extensions(extensions)
+        self._exclude_extensions = self._normalize_extensions(exclude_extensions)
+        self.min_size = min_size
+        self.max_size = max_size
+
+    @staticmethod
+    def _normalize_extensions(extensions: Iterable[str]) -> frozenset:
+        return frozenset(
+            (ext if ext.startswith(".") else "." + ext).lower() for ext in extensions if ext
+        )
+
+    @property
+    def active(self) -> bool:
+        """是否设置了任何过滤条件"""
+        return not (
+            self._include.empty
+            and self._exclude.empty
+            and self._exclude_dirs.empty
+            and not self._extensions
+            and not self._exclude_extensions
+            and self.min_size is None
+            and self.max_size is None
+        )
+
+    @property
+    def checks_size(self) -> bool:
+        return self.min_size is not None or self.max_size is not None
+
+    @staticmethod
+    def _slash(rel_path: str) -> str:
+        return rel_path.replace(os.sep, "/") if os.sep != "/" else rel_path
+
+    def skip_dir(self, name: str, rel_path: str) -> bool:
+        """目录是否被排除（rel_path 为相对遍历根目录的路径）"""
+        if self._exclude_dirs.empty:
+            return False
+        return self._exclude_dirs.matches(name, self._slash(rel_path))
+
+    def accepts_name(self, name: str, rel_path: str) -> bool:
+        """只按名称和路径判断文件，不需要文件大小"""
+        rel_path = self._slash(rel_path)
+        if not self._exclude.empty and self._exclude.matches(name, rel_path):
+            return False
+        if self._extensions or self._exclude_extensions:
+            extension = os.path.splitext(name)[1].lower()
+            if self._extensions and extension not in self._extensions:
+                return False
+            if extension in self._exclude_extensions:
+                return False
+        if not self._include.empty and not self._include.matches(name, rel_path):
+            return False
+        return True
+
+    def accepts_size(self, size: int) -> bool:
+        if self.min_size is not None and size < self.min_size:
+            return False
+        if self.max_size is not None and size > self.max_size:
+            return False
+        return True
+
+    def accepts_path(self, rel_path: str, size: int) -> bool:
+        """
+        完整判断一个文件，包括它所在的每一级目录
+
+        用于不经过遍历得到的文件（如监视模式发现的新文件）
+        """
+        parts = self._slash(rel_path).split("/")
+        for depth in range(1, len(parts)):
+            if self.skip_dir(parts[depth - 1], "/".join(parts[:depth])):
+                return False
+        return self.accepts_name(parts[-1], rel_path) and self.accepts_size(size)
@@ -0,0 +1,343 @@
+"""
+正则规则检查
+加载时找出容易产生灾难性回溯的写法，并用构造的极端文件名实测每条规则的耗时
+"""
+
+import re
+import time
+from typing import Callable, List, Optional, Pattern, Set, Tuple
+
+from .literal import _sre_parse, _sre_constants, _REPEATS
+from .budget import RuleTimeout, time_limit
+
+
+_MAXREPEAT = _sre_constants.MAXREPEAT
+_LITERAL = _sre_constants.LITERAL
+_NOT_LITERAL = _sre_constants.NOT_LITERAL
+_ANY = _sre_constants.ANY
+_IN = _sre_constants.IN
+_SUBPATTERN = _sre_constants.SUBPATTERN
+_BRANCH = _sre_constants.BRANCH
+
+# 用于判断两个字符集是否有交集的探测字符
+_PROBE_CHARS = (
+    "abcxyzABCXYZ0123456789 \t-_.,()[]!@#$%^&+=~'"
+    "éß中文　０"
+)
+
+# 实测时的文件名长度，逐步加长，超过上限立即停止，指数级回溯也不会卡住
+_LENGTHS = (8, 12, 16, 20, 24, 32, 48, 64, 96, 128, 192, 255)
+
+# 常见文件名样本，重复拼接到指定长度
+_SAMPLES = (
+    "Show Name - 12_v2",
+    "IMG_20231201_0001",
+    "report 2023-12-01 final",
+    "Prefix-MyFile-Suffix",
+)
+
+# 默认的实测耗时上限（秒），单次匹配超过它即视为慢规则
+DEFAULT_SLOW_SECONDS = 0.01
+
+
+def _char_test(op, av, ignore_case: bool) -> Optional[Callable[[str], bool]]:
+    """单字符语法节点 -> 判断字符是否可被匹配的函数；不是单字符节点时返回 None"""
+    if op is _LITERAL or op is _NOT_LITERAL:
+        expected = chr(av)
+        if ignore_case:
+            expected = expected.casefold()
+            same = lambda ch: ch.casefold() == expected
+        else:
+            same = lambda ch: ch == expected
+        return same if op is _LITERAL else (lambda ch: not same(ch))
+
+    if op is _ANY:
+        return lambda ch: ch != "\n"
+
+    if op is _IN:
+        # 直接用 re 判断，避免重新实现字符类的语义
+        pattern = _class_pattern(av, ignore_case)
+        if pattern is None:
+            return lambda ch: True
+        return lambda ch: pattern.fullmatch(ch) is not None
+
+    return None
+
+
+def _class_pattern(items, ignore_case: bool) -> Optional[Pattern]:
+    """把字符类语法节点还原为正则"""
+    parts = []
+    negate = ""
+    categories = {
+        "CATEGORY_DIGIT": r"\d",
+        "CATEGORY_NOT_DIGIT": r"\D",
+        "CATEGORY_SPACE": r"\s",
+        "CATEGORY_NOT_SPACE": r"\S",
+        "CATEGORY_WORD": r"\w",
+        "CATEGORY_NOT_WORD": r"\W",
+    }
+    for op, av in items:
+        name = str(op)
+        if name == "NEGATE":
+            negate = "^"
+        elif op is _LITERAL:
+            parts.append(re.escape(chr(av)))
+        elif name == "RANGE":
+            parts.append(f"{re.escape(chr(av[0]))}-{re.escape(chr(av[1]))}")
+        elif name == "CATEGORY" and str(av) in categories:
+            parts.append(categories[str(av)])
+        else:
+            return None
+    return re.compile(f"[{negate}{''.join(parts)}]", re.IGNORECASE if ignore_case else 0)
+
+
+def _single_item(sub) -> Optional[Tuple]:
+    """重复体只有一个单字符节点时返回该节点"""
+    items = list(sub)
+    if len(items) == 1:
+        return items[0]
+    return None
+
+
+def _overlaps(first, second, ignore_case: bool) -> bool:
+    """两个单字符节点能否匹配同一个字符（用探测字符近似判断）"""
+    test_a = _char_test(*first, ignore_case)
+    test_b = _char_test(*second, ignore_case)
+    if test_a is None or test_b is None:
+        return False
+    return any(test_a(ch) and test_b(ch) for ch in _PROBE_CHARS)
+
+
+def _describe(item) -> str:
+    op, av = item
+    if op is _LITERAL:
+        return repr(chr(av))
+    if op is _ANY:
+        return "."
+    if op is _IN:
+        pattern = _class_pattern(av, False)
+        if pattern is None:
+            return "[...]"
+        # 只有一个类别时去掉方括号，如 [\s] -> \s
+        inner = pattern.pattern[1:-1]
+        return inner if re.fullmatch(r"\\[dDsSwW]", inner) else pattern.pattern
+    return str(op).lower()
+
+
+def _unbounded_repeat(item):
+    """无上限的重复节点返回 (最少次数, 重复体)，否则返回 None"""
+    op, av = item
+    if op in _REPEATS and av[1] == _MAXREPEAT:
+        return av[0], av[2]
+    return None
+
+
+def _contains_unbounded(items) -> bool:
+    for op, av in items:
+        if op in _REPEATS:
+            if av[1] == _MAXREPEAT or _contains_unbounded(av[2]):
+                return True
+        elif op is _SUBPATTERN:
+            if _contains_unbounded(av[-1]):
+                return True
+        elif op is _BRANCH:
+            if any(_contains_unbounded(branch) for branch in av[1]):
+                return True
+    return False
+
+
+def _contains_branch(items) -> bool:
+    """是否包含分支（解析器会把 a|ab 的公共前缀提出来，分支可能藏在分组里）"""
+    for op, av in items:
+        if op is _BRANCH:
+            return True
+        if op is _SUBPATTERN and _contains_branch(av[-1]):
+            return True
+    return False
+
+
+def _contains_group(items) -> bool:
+    """是否包含捕获组"""
+    for op, av in items:
+        if op is _SUBPATTERN and (av[0] is not None or _contains_group(av[-1])):
+            return True
+        if op in _REPEATS and _contains_group(av[2]):
+            return True
+        if op is _BRANCH and any(_contains_group(branch) for branch in av[1]):
+            return True
+    return False
+
+
+def _leading_any(items) -> bool:
+    """是否以 .* / .+ 开头"""
+    if not items:
+        return False
+    first = _unbounded_repeat(items[0])
+    if first is None:
+        return False
+    single = _single_item(first[1])
+    return single is not None and single[0] is _ANY
+
+
+def _check(items, ignore_case: bool, warnings: List[str], top: bool = False) -> None:
+    """
+    递归检查语法树
+
+    top 为 True 时是整个模式：开头的 .* 后面还有捕获组时，是“取最后一处匹配”的惯用写法
+    （如 .*-(\d+)），不报告开头的 .*，也不报告它与紧随其后的重复重叠
+    """
+    items = list(items)
+    last_match = top and len(items) > 1 and _leading_any(items) and _contains_group(items[1:])
+    previous = None  # 上一个无上限重复的单字符节点
+    leading = None  # 开头的 .* 节点
+
+    for index, item in enumerate(items):
+        op, av = item
+        repeat = _unbounded_repeat(item)
+
+        if op in _REPEATS:
+            body = av[2]
+            if repeat is not None and _contains_unbounded(body):
+                warnings.append("嵌套的无上限量词（如 (a+)+），匹配失败时可能指数级回溯")
+            elif repeat is not None and _contains_branch(body):
+                warnings.append("量词作用于分支（如 (a|ab)*），分支重叠时可能指数级回溯")
+            _check(body, ignore_case, warnings)
+        elif op is _SUBPATTERN:
+            _check(av[-1], ignore_case, warnings)
+        elif op is _BRANCH:
+            for branch in av[1]:
+                _check(branch, ignore_case, warnings)
+
+        single = _single_item(repeat[1]) if repeat is not None else None
+        if single is not None:
+            if (
+                previous is not None
+                and not (last_match and previous is leading)
+                and _overlaps(previous, single, ignore_case)
+            ):
+                warnings.append(
+                    f"相邻的无上限重复 {_describe(previous)} 与 {_describe(single)} "
+                    f"能匹配相同字符，匹配失败时会反复回溯"
+                )
+            previous = single
+            if index == 0:
+                leading = single
+        elif op is not _sre_constants.AT:
+            # 锚点不占字符，其他节点都会把相邻关系断开
+            previous = None
+
+    # 开头的 .* 在 search 中会让每个起点都扫描到结尾
+    if _leading_any(items) and len(items) > 1 and not last_match:
+        warnings.append(
+            "以 .* 开头：规则用 search 匹配，开头的 .* 会让匹配失败的文件名耗时随长度平方增长；"
+            "如果不是为了取最后一处匹配，可以去掉"
+        )
+
+
+def lint_pattern(pattern: Pattern) -> List[str]:
+    """
+    静态检查正则写法
+
+    Args:
+        pattern: 编译后的正则表达式
+
+    Returns:
+        警告列表（去重，保持顺序）
+    """
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return []
+
+    warnings: List[str] = []
+    _check(parsed, bool(pattern.flags & re.IGNORECASE), warnings, top=True)
+    return list(dict.fromkeys(warnings))
+
+
+def _characters(items, found: Set[str]) -> None:
+    """收集模式中出现的字符和字符类代表字符，用于构造极端文件名"""
+    for op, av in items:
+        if op is _LITERAL:
+            found.add(chr(av))
+        elif op is _ANY:
+            found.add("a")
+        elif op is _IN:
+            pattern = _class_pattern(av, False)
+            for ch in _PROBE_CHARS:
+                if pattern is None or pattern.fullmatch(ch):
+                    found.add(ch)
+                    break
+        elif op in _REPEATS:
+            _characters(av[2], found)
+        elif op is _SUBPATTERN:
+            _characters(av[-1], found)
+        elif op is _BRANCH:
+            for branch in av[1]:
+                _characters(branch, found)
+
+
+def adversarial_names(pattern: Pattern, length: int) -> List[str]:
+    """
+    为规则构造极端文件名
+
+    由模式中出现的字符重复组成，末尾加一个不太可能匹配的字符迫使匹配失败后回溯，
+    另加几个常见文件名样本重复拼接到相同长度
+    """
+    found: Set[str] = set()
+    try:
+        _characters(_sre_parse.parse(pattern.pattern, pattern.flags), found)
+    except Exception:
+        pass
+
+    names = []
+    for ch in sorted(found)[:8]:
+        names.append(ch * length)
+        names.append(ch * (length - 1) + "☃")
+    if len(found) > 1:
+        unit = "".join(sorted(found)[:8])
+        names.append((unit * length)[:length])
+    for sample in _SAMPLES:
+        names.append((sample * (length // len(sample) + 1))[:length])
+    return names
+
+
+def time_pattern(
+    pattern: Pattern, limit: float = DEFAULT_SLOW_SECONDS
+) -> Tuple[float, str]:
+    """
+    用极端文件名实测规则耗时
+
+    文件名从短到长逐步加长，单次匹配超过 limit 即停止
+
+    Args:
+        pattern: 编译后的正则表达式
+        limit: 单次匹配的耗时上限（秒）
+
+    Returns:
+        (最长的单次耗时, 对应的文件名)
+    """
+    search = pattern.search
+    clock = time.perf_counter
+    worst = (0.0, "")
+
+    def measure(name):
+        start = clock()
+        try:
+            # 能中断时给出宽松的硬上限，防止指数级回溯卡住加载
+            with time_limit(max(limit * 50, 0.5)):
+                search(name)
+        except RuleTimeout:
+            return clock() - start, True
+        return clock() - start, False
+
+    for length in _LENGTHS:
+        for name in adversarial_names(pattern, length):
+            elapsed, interrupted = measure(name)
+            if elapsed > limit and not interrupted:
+                # 排除偶发的调度、垃圾回收抖动
+                elapsed = min(elapsed, measure(name)[0])
+            if elapsed > worst[0]:
+                worst = (elapsed, name)
+            if elapsed > limit:
+                return worst
+    return worst
@@ -0,0 +1,82 @@
+"""
+必需字面量分析
+从正则表达式的语法树中找出任何匹配都必然包含的一段字面量，
+文件名中没有这段字面量时可以跳过正则匹配
+"""
+
+import re
+from typing import Iterator, Optional, Pattern
+
+try:
+    from re import _parser as _sre_parse
+    from re import _constants as _sre_constants
+except ImportError:  # Python 3.10 及更早
+    import sre_parse as _sre_parse
+    import sre_constants as _sre_constants
+
+
+_LITERAL = _sre_constants.LITERAL
+_SUBPATTERN = _sre_constants.SUBPATTERN
+_REPEATS = tuple(
+    getattr(_sre_constants, name)
+    for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(_sre_constants, name)
+)
+_ATOMIC_GROUP = getattr(_sre_constants, "ATOMIC_GROUP", None)
+
+
+def _runs(items, ignore_case: bool) -> Iterator[str]:
+    """
+    产出语法树中必然出现的连续字面量
+
+    只沿必经的路径下探：顺序序列、分组、至少重复一次的片段；
+    分支、可选片段、断言等一律视为断开
+    """
+    run = []
+    for op, av in items:
+        if op is _LITERAL:
+            run.append(chr(av))
+            continue
+
+        if run:
+            yield "".join(run)
+            run = []
+
+        if op is _SUBPATTERN:
+            add_flags, sub = av[1], av[-1]
+            # (?i:...) 局部忽略大小写，而整体区分大小写时，按原样比较会漏掉匹配
+            if add_flags & re.IGNORECASE and not ignore_case:
+                continue
+            yield from _runs(sub, ignore_case)
+        elif op in _REPEATS:
+            low, _, sub = av
+            if low >= 1:
+                yield from _runs(sub, ignore_case)
+        elif op is _ATOMIC_GROUP:
+            yield from _runs(av, ignore_case)
+
+    if run:
+        yield "".join(run)
+
+
+def required_literal(pattern: Pattern) -> Optional[str]:
+    """
+    找出正则表达式任何匹配都必然包含的最长字面量
+
+    忽略大小写的模式返回按原样书写的字面量，比较时应使用 fold_case
+
+    Args:
+        pattern: 编译后的正则表达式
+
+    Returns:
+        字面量；无法证明存在时返回 None
+    """
+    if not isinstance(pattern.pattern, str):
+        return None
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return None
+
+    ignore_case = bool(pattern.flags & re.IGNORECASE)
+    return max(_runs(parsed, ignore_case), key=len, default=None)
@@ -3,11 +3,13 @@
 统一的规则加载接口
 """
 
+import os
 from typing import List, Optional
 from .types import Rule
 from .simple_loader import SimpleRuleLoader
 from .regex_loader import RegexRuleLoader
 from .configurator import InteractiveConfigurator
+from .rule_cache import RuleCache
 
 
 class RuleLoader:
@@ -24,28 +26,60 @@ class RuleLoader:
         self.script_dir = script_dir
         self.configurator = configurator or InteractiveConfigurator()
 
-    def load_simple_rules(self) -> List[Rule]:
+    def load_simple_rules(self, rules_file: Optional[str] = None) -> List[Rule]:
         """
         加载替换规则
 
+        Args:
+            rules_file: 规则文件路径，默认为脚本目录下的 words.txt
+
         Returns:
             规则列表
         """
-        return SimpleRuleLoader.load(self.script_dir)
+        return SimpleRuleLoader.load(self.script_dir, rules_file)
 
-    def load_regex_rules(self, interactive: bool = True) -> List[Rule]:
+    def load_regex_rules(
+        self,
+        interactive: bool = True,
+        use_cache: bool = True,
+        refresh: bool = False,
+        rules_file: Optional[str] = None,
+    ) -> List[Rule]:
         """
         加载正则表达式规则
 
+        规则文件内容没有变化时直接读取规则文件旁的缓存（如 .regex_rules.cache.json），
+        不再解析、检查规则，已配置过的交互式参数也不再询问
+
         Args:
             interactive: 是否进行交互式配置
+            use_cache: 是否读写规则缓存
+            refresh: 忽略已有缓存，重新解析并询问参数，结果写回缓存
+            rules_file: 规则文件路径，默认为脚本目录下的 regex_rules.txt
 
         Returns:
             规则列表
         """
-        rules = RegexRuleLoader.load(self.script_dir)
+        rules_file = rules_file or os.path.join(self.script_dir, "regex_rules.txt")
+        source_hash = RuleCache.file_hash(rules_file) if use_cache else None
+
+        cached = None
+        if source_hash and not refresh:
+            cached = RuleCache.load(rules_file, source_hash)
+        if cached is not None:
+            rules, configured = cached
+            if configured or not interactive:
+                print(f" 规则文件未变化，使用缓存的 {len(rules)} 条正则表达式规则")
+                if configured:
+                    print(f" 沿用上次设置的参数，如需重新设置，删除 {RuleCache.path_for(rules_file)}")
+                return rules
+        else:
+            rules = RegexRuleLoader.load(self.script_dir, rules_file=rules_file)
 
         if interactive and rules:
             self.configurator.configure(rules)
 
+        if source_hash and rules:
+            RuleCache.save(rules_file, rules, interactive, source_hash)
+
         return rules
@@ -0,0 +1,152 @@
+"""
+运行清单
+记录输出目录中已完成的文件，用于增量运行和中断后续跑
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Optional, Set
+
+
+# 清单文件名，保存在输出目录下
+MANIFEST_NAME = ".renamefile_manifest.jsonl"
+
+
+class RunManifest:
+    """
+    运行清单
+
+    每个文件开始生成前写一条 pending 记录，完成后写一条 done 记录，逐行刷盘。
+    进程中途退出时，pending 的目标仍视为本工具所有，下次会被重新生成而不是另起新名
+    """
+
+    def __init__(self, output_dir: str):
+        """
+        读取输出目录下已有的清单，并以追加方式打开
+
+        Args:
+            output_dir: 输出目录
+        """
+        self.output_dir = output_dir
+        self._prefix = os.path.join(output_dir, "")
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        # 源文件路径 -> 记录
+        self.records: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+        lines = self._load()
+
+        os.makedirs(output_dir, exist_ok=True)
+        # 历史记录明显多于有效记录时压缩一次
+        if lines > 2 * len(self.records) + 1000:
+            self._rewrite()
+
+        self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+        if lines and not self._ends_with_newline():
+            # 上次中断时最后一行只写了一半，另起一行避免与新记录粘连
+            self._file.write("\n")
+
+    def _load(self) -> int:
+        """读取清单，后写入的记录覆盖先写入的；返回读取的行数"""
+        lines = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # 中断时写了一半的行
+                    self.records[record["source"]] = record
+        except FileNotFoundError:
+            pass
+        return lines
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _rewrite(self) -> None:
+        """只保留每个源文件的最新记录"""
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for record in self.records.values():
+                f.write(json.dumps(record) + "\n")
+        os.replace(temp_path, self.path)
+
+    def _relative(self, dest: str) -> str:
+        """目标路径转为相对输出目录的路径，清单随输出目录移动仍然有效"""
+        if dest.startswith(self._prefix):
+            return dest[len(self._prefix) :]
+        return os.path.relpath(dest, self.output_dir)
+
+    def _dest(self, record: dict) -> str:
+        return os.path.join(self.output_dir, record["dest"])
+
+    def owned_destinations(self) -> Set[str]:
+        """清单中记录的所有目标路径（包括未完成的），这些文件可以被重新生成"""
+        return {self._dest(record) for record in self.records.values()}
+
+    def destination(self, source: str) -> Optional[str]:
+        """清单中记录的源文件的目标路径，没有记录时返回 None"""
+        record = self.records.get(source)
+        return self._dest(record) if record is not None else None
+
+    def is_current(self, item, fingerprint: str, output_mode: str) -> bool:
+        """
+        判断文件是否已在之前的运行中完成且无需重做
+
+        要求：源文件大小和修改时间未变、规则指纹和输出方式相同、
+        目标路径与本次规划一致，且目标文件仍然存在
+
+        Args:
+            item: PlanItem
+            fingerprint: 当前规则指纹
+            output_mode: 当前输出方式
+        """
+        record = self.records.get(item.source)
+        return (
+            record is not None
+            and record.get("state") == "done"
+            and record.get("size") == item.size
+            and record.get("mtime_ns") == item.mtime_ns
+            and record.get("rules") == fingerprint
+            and record.get("mode") == output_mode
+            and self._dest(record) == item.dest
+            and os.path.lexists(item.dest)
+        )
+
+    def _write(self, record: dict) -> None:
+        # 按 ASCII 转义：无法解码的文件名含有代理字符，转义后才能写入并原样读回
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def begin(self, item) -> None:
+        """登记即将生成的文件"""
+        self._write(
+            {
+                "source": item.source,
+                "dest": self._relative(item.dest),
+                "state": "pending",
+            }
+        )
+
+    def complete(self, item, fingerprint: str, output_mode: str) -> None:
+        """登记已完成的文件"""
+        self._write(
+            {
+                "source": item.source,
+                "dest": self._relative(item.dest),
+                "state": "done",
+                "size": item.size,
+                "mtime_ns": item.mtime_ns,
+                "rules": fingerprint,
+                "mode": output_mode,
+            }
+        )
+
+    def close(self) -> None:
+        self._file.close()
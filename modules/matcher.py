@@ -0,0 +1,154 @@
+"""
+多模式匹配器
+基于 Aho-Corasick 自动机，一次扫描找出文件名中出现的所有替换词
+"""
+
+import re
+from typing import Dict, List, Set
+from .types import Rule
+
+
+# re.IGNORECASE 会把 İ / ı 与 i / I 视为相同，casefold 不会，这里先统一掉
+_FOLD_TABLE = str.maketrans({"İ": "i", "ı": "i"})
+
+
+def fold_case(text: str) -> str:
+    """
+    大小写折叠，用于不区分大小写的字面量比较
+
+    结果是 re.IGNORECASE 的超集：正则能匹配到的，折叠后一定包含
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        折叠后的文本
+    """
+    if text.isascii():
+        return text.lower()
+    return text.translate(_FOLD_TABLE).casefold()
+
+
+class MultiPatternMatcher:
+    """替换规则的多模式匹配器"""
+
+    def __init__(self, rules: List[Rule]):
+        """
+        根据替换规则构建自动机
+
+        Args:
+            rules: 替换规则列表（rule_type 均为 simple）
+        """
+        self.rules = list(rules)
+
+        # 空的原文本在任何位置都能匹配，始终作为候选
+        self._always: Set[int] = set()
+
+        # 自动机：goto 表、失败指针、每个状态命中的规则序号
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[tuple] = [()]
+
+        for index, rule in enumerate(self.rules):
+            keyword = fold_case(self._literal(rule))
+            if not keyword:
+                self._always.add(index)
+                continue
+            self._add_keyword(keyword, index)
+
+        self._build_fail_links()
+
+    @staticmethod
+    def _literal(rule: Rule) -> str:
+        """取出规则对应的原文本"""
+        source = rule.metadata.get("source")
+        if source is None:
+            # 兼容没有记录原文本的规则，用已转义的模式串还原
+            source = re.sub(r"\\(.)", r"\1", rule.pattern.pattern, flags=re.DOTALL)
+        return source
+
+    def _add_keyword(self, keyword: str, index: int) -> None:
+        """向字典树中插入一个关键字"""
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state] = self._output[state] + (index,)
+
+    def _build_fail_links(self) -> None:
+        """广度优先构建失败指针，并合并输出"""
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = (
+                    self._output[next_state] + self._output[self._fail[next_state]]
+                )
+
+    def scan(self, text: str) -> Set[int]:
+        """
+        扫描一次文本，返回出现过的规则序号
+
+        Args:
+            text: 文件名
+
+        Returns:
+            命中的规则序号集合
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        hits = set(self._always)
+        state = 0
+
+        for char in fold_case(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                hits.update(output[state])
+
+        return hits
+
+    def apply(self, text: str) -> str:
+        """
+        按规则顺序应用替换，结果与逐条执行 pattern.sub 一致
+
+        只有命中的规则才会执行替换；替换改变了文本时重新扫描，
+        以便捕获替换后新出现的关键字
+
+        Args:
+            text: 原始文件名（不含扩展名）
+
+        Returns:
+            处理后的文件名
+        """
+        hits = self.scan(text)
+        position = -1
+
+        while True:
+            pending = [index for index in hits if index > position]
+            if not pending:
+                return text
+
+            position = min(pending)
+            rule = self.rules[position]
+            new_text = rule.pattern.sub(rule.replacement, text)
+
+            if new_text != text:
+                text = new_text
+                hits = self.scan(text)
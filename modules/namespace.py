@@ -0,0 +1,129 @@
+"""
+目标命名空间索引
+记录每个输出目录已占用的文件名，冲突处理无需反复探测磁盘
+"""
+
+import os
+import sys
+from typing import Dict, Iterable, Optional, Set
+
+from .plan_store import PlanStore
+
+
+def _default_case_sensitive() -> bool:
+    """Windows 与 macOS 默认文件系统不区分大小写"""
+    return not (sys.platform == "win32" or sys.platform == "darwin")
+
+
+# 计划存储中的表名
+_NAMES = "names"
+_COUNTERS = "counters"
+
+
+class DestinationIndex:
+    """
+    目标命名空间索引
+
+    已占用的名称和后缀计数保存在 PlanStore 中：目录路径只保存一次，
+    超过内存预算时转存到磁盘，冲突检测直接读写磁盘上的数据
+    """
+
+    def __init__(
+        self,
+        probe: bool = True,
+        case_sensitive: Optional[bool] = None,
+        owned: Optional[Iterable[str]] = None,
+        store: Optional[PlanStore] = None,
+    ):
+        """
+        Args:
+            probe: 首次用到某个目录时是否读取一次磁盘上已有的文件名；
+                为 False 时只在本次分配的名称之间避让（用于只生成计划）
+            case_sensitive: 文件名是否区分大小写，默认按平台判断
+            owned: 本工具之前生成、可以重新生成的文件路径，读取磁盘时不视为占用
+            store: 保存名称的计划存储，默认为不限内存的新存储
+        """
+        self.probe = probe
+        self.case_sensitive = (
+            _default_case_sensitive() if case_sensitive is None else case_sensitive
+        )
+        self.store = store if store is not None else PlanStore()
+        # 已经读取过磁盘的目录编号
+        self._probed: Set[int] = set()
+
+        # 目录 -> 该目录下属于本工具的文件名
+        self._owned: Dict[str, Set[str]] = {}
+        for path in owned or ():
+            dest_dir, name = os.path.split(path)
+            self._owned.setdefault(dest_dir, set()).add(self._key(name))
+
+    def _key(self, name: str) -> str:
+        return name if self.case_sensitive else name.casefold()
+
+    def _space(self, dest_dir: str) -> int:
+        """取得目录编号，首次访问时列出一次已有文件"""
+        dir_id = self.store.dir_id(dest_dir)
+        if dir_id not in self._probed:
+            self._probed.add(dir_id)
+            if self.probe:
+                names = set()
+                try:
+                    with os.scandir(dest_dir) as it:
+                        names = {self._key(entry.name) for entry in it}
+                except OSError:
+                    pass
+                names -= self._owned.pop(dest_dir, set())
+                self.store.put_many(_NAMES, dir_id, names)
+        return dir_id
+
+    def claim(self, dest_dir: str, filename: str) -> str:
+        """
+        为文件分配一个不冲突的名称
+
+        名称已被占用时依次尝试 name_1.ext、name_2.ext ……，
+        每个 (名称, 扩展名) 记住下一个后缀，分配是均摊 O(1) 的
+
+        Args:
+            dest_dir: 目标目录
+            filename: 期望的文件名
+
+        Returns:
+            分配到的完整路径
+        """
+        store = self.store
+        dir_id = self._space(dest_dir)
+        key = self._key(filename)
+
+        if not store.contains(_NAMES, dir_id, key):
+            store.put(_NAMES, dir_id, key)
+            return os.path.join(dest_dir, filename)
+
+        name, ext = os.path.splitext(filename)
+        # 文件名中不会出现 /，用它连接名称和扩展名
+        counter_key = f"{self._key(name)}/{self._key(ext)}"
+        counter = store.get(_COUNTERS, dir_id, counter_key, 1)
+
+        while True:
+            candidate = f"{name}_{counter}{ext}"
+            counter += 1
+            candidate_key = self._key(candidate)
+            if not store.contains(_NAMES, dir_id, candidate_key):
+                break
+
+        store.put(_NAMES, dir_id, candidate_key)
+        store.put(_COUNTERS, dir_id, counter_key, counter)
+        return os.path.join(dest_dir, candidate)
+
+    def release(self, path: str) -> None:
+        """
+        释放之前分配的路径，之后可以再次分配给同一个文件
+
+        用于重新生成已处理过的文件（如监视模式下源文件被修改），使其沿用原来的目标名称
+        """
+        dest_dir, filename = os.path.split(path)
+        self.store.remove(_NAMES, self._space(dest_dir), self._key(filename))
+
+    def clear(self) -> None:
+        """清空索引及其使用的计划存储"""
+        self._probed.clear()
+        self.store.close()
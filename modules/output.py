@@ -0,0 +1,130 @@
+"""
+输出策略
+决定文件以何种方式出现在输出目录：复制、硬链接、克隆或符号链接
+"""
+
+import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# 输出方式
+OUTPUT_MODES = {
+    "copy": "复制",
+    "hardlink": "硬链接",
+    "reflink": "克隆 (reflink)",
+    "symlink": "符号链接",
+}
+
+# Linux ioctl: FICLONE，btrfs / xfs 等支持写时复制的文件系统可用
+_FICLONE = 0x40049409
+
+
+def contains_path(parent: str, path: str) -> bool:
+    """
+    path 是否就是 parent 或位于 parent 之下
+
+    parent 为根目录（/、D:\\）时同样成立；不在同一驱动器时返回 False
+    """
+    parent = os.path.normcase(os.path.abspath(parent))
+    path = os.path.normcase(os.path.abspath(path))
+    try:
+        return os.path.commonpath([parent, path]) == parent
+    except ValueError:
+        return False
+
+
+def can_clear(output_dir: str, source_dir: str) -> bool:
+    """输出目录能否整个删除：不能是根目录，也不能是源目录或其上级"""
+    output_abs = os.path.abspath(output_dir)
+    if os.path.dirname(output_abs) == output_abs:
+        return False
+    return not contains_path(output_abs, source_dir)
+
+
+def _remove_existing(dest: str) -> None:
+    """
+    删除已存在的目标
+
+    目标可能是上次运行留下的硬链接或符号链接，
+    直接写入会改到源文件，所以先删除再创建
+    """
+    if os.path.lexists(dest) and not os.path.isdir(dest):
+        os.unlink(dest)
+
+
+def _reflink(source: str, dest: str) -> None:
+    """克隆文件：优先 FICLONE，其次 copy_file_range（同一文件系统上由内核完成）"""
+    with open(source, "rb") as src, open(dest, "wb") as dst:
+        try:
+            if fcntl is None:
+                raise OSError("不支持 FICLONE")
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        except OSError:
+            if not hasattr(os, "copy_file_range"):
+                raise
+            remaining = os.fstat(src.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+    shutil.copystat(source, dest)
+
+
+def materialize(
+    source: str, dest: str, mode: str = "copy", overwrite: bool = True, copier=None
+) -> str:
+    """
+    按指定方式把源文件放到目标路径
+
+    链接或克隆失败（跨文件系统、权限不足、文件系统不支持等）时回退为复制
+
+    Args:
+        source: 源文件路径
+        dest: 目标路径
+        mode: 输出方式，见 OUTPUT_MODES
+        overwrite: 目标已存在时是否替换；为 False 时抛出 FileExistsError
+        copier: 复制时使用的 FileCopier，None 表示 shutil.copy2
+
+    Returns:
+        实际使用的输出方式
+    """
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"未知的输出方式: {mode}")
+
+    if not overwrite and os.path.lexists(dest):
+        raise FileExistsError(f"目标已存在: {dest}")
+
+    _remove_existing(dest)
+
+    if mode == "hardlink":
+        try:
+            os.link(source, dest)
+            return mode
+        except OSError:
+            pass
+
+    elif mode == "symlink":
+        try:
+            os.symlink(os.path.abspath(source), dest)
+            return mode
+        except OSError:
+            pass
+
+    elif mode == "reflink":
+        try:
+            _reflink(source, dest)
+            return mode
+        except OSError:
+            _remove_existing(dest)
+
+    if copier is not None:
+        copier.copy(source, dest)
+    else:
+        shutil.copy2(source, dest)
+    return "copy"
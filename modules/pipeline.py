@@ -0,0 +1,185 @@
+"""
+流水线工具
+遍历 -> 规划 -> 执行 三个阶段之间通过有界队列连接，各阶段可以并行
+"""
+
+import collections
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# 队列结束标记
+_DONE = object()
+
+
+class PlanItem:
+    """规划阶段的产出：一个源文件及其目标路径"""
+
+    __slots__ = ("source", "relative_source", "dest", "file", "new_file", "size", "mtime_ns")
+
+    def __init__(self, source, relative_source, dest, file, new_file, size=0, mtime_ns=0):
+        """
+        Args:
+            source: 源文件路径
+            relative_source: 相对于源目录的路径（用于日志）
+            dest: 目标路径
+            file: 原文件名
+            new_file: 应用规则后的文件名（冲突处理之前）
+            size: 文件大小
+            mtime_ns: 修改时间（纳秒）
+        """
+        self.source = source
+        self.relative_source = relative_source
+        self.dest = dest
+        self.file = file
+        self.new_file = new_file
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    def __repr__(self):
+        return f"PlanItem({self.relative_source!r} -> {self.dest!r})"
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """放入队列；消费者已退出时放弃并返回 False"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def background(iterable: Iterable[T], maxsize: int = 1024) -> Iterator[T]:
+    """
+    在后台线程中迭代 iterable，通过有界队列把结果交给调用方
+
+    上游（如目录遍历）与下游（如规则计算）因此可以重叠执行，
+    队列满时上游阻塞，内存占用不随目录规模增长。上游抛出的异常会在这里重新抛出
+
+    Args:
+        iterable: 上游迭代器
+        maxsize: 队列容量
+
+    Yields:
+        上游产出的元素
+    """
+    q: queue.Queue = queue.Queue(maxsize)
+    stop = threading.Event()
+    errors = []
+
+    def produce():
+        try:
+            for item in iterable:
+                if not _put(q, item, stop):
+                    return
+        except BaseException as e:
+            errors.append(e)
+        _put(q, _DONE, stop)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+
+def run_stage(
+    items: Iterable[T], func: Callable[[T], None], workers: int = 1, maxsize: int = 0
+) -> None:
+    """
+    用 workers 个线程消费 items，对每个元素调用 func
+
+    生产（迭代 items）在调用线程进行，与执行并行；队列有界，
+    func 需要自行处理单个元素的错误，这里抛出的异常会中止整个阶段
+
+    Args:
+        items: 待执行的元素
+        func: 执行函数
+        workers: 执行线程数
+        maxsize: 队列容量，默认为线程数的 4 倍
+    """
+    q: queue.Queue = queue.Queue(maxsize or workers * 4)
+    stop = threading.Event()
+    errors = []
+
+    def consume():
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if stop.is_set():
+                continue
+            try:
+                func(item)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+
+    threads = [threading.Thread(target=consume, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        for item in items:
+            if not _put(q, item, stop):
+                break
+    finally:
+        for _ in threads:
+            q.put(_DONE)
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+
+
+def ordered_map(
+    executor,
+    func: Callable[[Any], Any],
+    items: Iterable[T],
+    window: int,
+    argument: Optional[Callable[[T], Any]] = None,
+) -> Iterator[Tuple[T, Any]]:
+    """
+    把 items 交给执行器（如进程池）并行计算，按输入顺序产出结果
+
+    同时在途的任务不超过 window 个，items 按需读取，内存占用与总量无关
+
+    Args:
+        executor: concurrent.futures 执行器
+        func: 计算函数，进程池时必须是模块级函数
+        items: 输入
+        window: 最多同时提交的任务数
+        argument: 从输入中取出传给 func 的参数，默认传入整个元素
+
+    Yields:
+        (输入元素, 计算结果)
+    """
+    pending: collections.deque = collections.deque()
+    try:
+        for item in items:
+            value = argument(item) if argument is not None else item
+            pending.append((item, executor.submit(func, value)))
+            if len(pending) >= window:
+                item, future = pending.popleft()
+                yield item, future.result()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+    finally:
+        for _, future in pending:
+            future.cancel()
@@ -0,0 +1,108 @@
+"""
+重命名计划文件
+以 JSONL 或 CSV 流式读写 源路径 -> 目标路径 的映射
+"""
+
+import csv
+import json
+import os
+from typing import Iterator
+from .pipeline import PlanItem
+
+
+# 计划文件中的字段，顺序即 CSV 的列顺序
+PLAN_FIELDS = ("source", "relative_source", "dest", "file", "new_file", "size", "mtime_ns")
+
+
+def _is_csv(path: str) -> bool:
+    """按扩展名判断格式，默认 JSONL"""
+    return path.lower().endswith(".csv")
+
+
+# 无法解码的文件名含有代理字符：JSONL 按 ASCII 转义，CSV 按原字节写入、读回
+_ERRORS = "surrogateescape"
+
+
+class PlanWriter:
+    """
+    计划文件写入器，逐条写入，不在内存中保留计划
+
+    先写入同目录下的临时文件，正常结束后再替换为计划文件；
+    中途出错时删除临时文件，不会留下只写了一半的计划
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 计划文件路径，.csv 结尾写 CSV，否则写 JSONL
+        """
+        self.path = path
+        self._temp_path = path + ".tmp"
+        self._file = open(self._temp_path, "w", encoding="utf-8", errors=_ERRORS, newline="")
+        self._csv = None
+        if _is_csv(path):
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(PLAN_FIELDS)
+
+    def write(self, item: PlanItem) -> None:
+        """写入一条计划"""
+        values = [getattr(item, field) for field in PLAN_FIELDS]
+        if self._csv is not None:
+            self._csv.writerow(values)
+        else:
+            self._file.write(json.dumps(dict(zip(PLAN_FIELDS, values))))
+            self._file.write("\n")
+
+    def close(self) -> None:
+        """写完，用临时文件替换计划文件"""
+        if self._file.closed:
+            return
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+
+    def discard(self) -> None:
+        """放弃写入，删除临时文件，原有的计划文件保持不变"""
+        if self._file.closed:
+            return
+        self._file.close()
+        try:
+            os.unlink(self._temp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def read_plan(path: str) -> Iterator[PlanItem]:
+    """
+    逐条读取计划文件
+
+    Args:
+        path: 计划文件路径
+
+    Yields:
+        PlanItem
+    """
+    with open(path, "r", encoding="utf-8", errors=_ERRORS, newline="") as f:
+        if _is_csv(path):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+
+        for row in rows:
+            yield PlanItem(
+                row["source"],
+                row["relative_source"],
+                row["dest"],
+                row["file"],
+                row["new_file"],
+                int(row.get("size") or 0),
+                int(row.get("mtime_ns") or 0),
+            )
@@ -0,0 +1,314 @@
+"""
+计划存储
+冲突检测和执行阶段需要在整个运行期间保留的数据（已占用的目标名称、后缀计数、
+去重索引、等待执行的计划项）统一放在这里：目录路径只驻留一次，文件只引用目录编号；
+估算的占用超过内存预算后整体转存到临时 SQLite 文件，之后的读写都走磁盘，内存不再增长
+"""
+
+import marshal
+import os
+import sqlite3
+import tempfile
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .pipeline import PlanItem
+
+
+# 每条记录除字符串本身以外的估算开销（字典槽位、键对象等），字节
+_ENTRY_OVERHEAD = 96
+
+# 转存后每写入这么多条提交一次，避免单个事务过大
+_COMMIT_EVERY = 50000
+
+# 转存后 SQLite 页缓存的上限，KB
+_SQLITE_CACHE_KB = 16 * 1024
+
+# 从磁盘读取等待执行的计划项时每次取出的条数
+_FETCH_SIZE = 1024
+
+_MISSING = object()
+
+
+def _estimate(value) -> int:
+    """粗略估算一个值占用的字节数"""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, tuple):
+        return sum(_estimate(part) + 8 for part in value)
+    return 8
+
+
+def _key(key: str) -> bytes:
+    # 无法解码的文件名含有代理字符，按原样保留
+    return key.encode("utf-8", "surrogatepass")
+
+
+def _encode(value) -> bytes:
+    # 版本 2 不使用对象引用，同样的值总是得到同样的字节
+    return marshal.dumps(value, 2)
+
+
+class PlanStore:
+    """
+    紧凑的计划存储
+
+    键值数据按 (表, 分组, 键) 组织，分组一般是目录编号或文件大小；
+    另有一个先进先出的队列保存等待执行的计划项。未转存时全部在内存中，
+    转存后所有数据都在 SQLite 中，只有目录表留在内存（目录数远少于文件数）
+    """
+
+    def __init__(
+        self,
+        memory_budget: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        on_spill: Optional[Callable[[str], None]] = None,
+    ):
+        """
+        Args:
+            memory_budget: 内存预算（字节），估算占用超过后转存到磁盘；None 表示不限制
+            spill_dir: 转存文件所在目录，默认为系统临时目录
+            on_spill: 转存时调用，参数为转存文件路径
+        """
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.on_spill = on_spill
+
+        # 目录路径 <-> 目录编号
+        self._dir_ids: Dict[str, int] = {}
+        self._dir_paths: List[str] = []
+
+        self._tables: Dict[str, int] = {}
+        # 表编号 -> 分组 -> 键 -> 值
+        self._data: Dict[int, Dict[int, Dict[str, object]]] = {}
+        self._queue: List[tuple] = []
+        self._used = 0
+
+        self.path: Optional[str] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    @property
+    def spilled(self) -> bool:
+        """是否已经转存到磁盘"""
+        return self._db is not None
+
+    def dir_id(self, path: str) -> int:
+        """目录路径的编号，同一路径只保存一次"""
+        dir_id = self._dir_ids.get(path)
+        if dir_id is None:
+            dir_id = len(self._dir_paths)
+            self._dir_ids[path] = dir_id
+            self._dir_paths.append(path)
+        return dir_id
+
+    def dir_path(self, dir_id: int) -> str:
+        return self._dir_paths[dir_id]
+
+    def pack(self, item: PlanItem) -> tuple:
+        """把计划项压缩为只含目录编号、文件名和数字的元组"""
+        source_dir = os.path.dirname(item.source)
+        relative_dir = os.path.dirname(item.relative_source)
+        dest_dir, dest_name = os.path.split(item.dest)
+        return (
+            self.dir_id(source_dir),
+            self.dir_id(relative_dir),
+            item.file,
+            self.dir_id(dest_dir),
+            dest_name,
+            # 没有重名时目标文件名就是新文件名，不重复保存
+            None if item.new_file == dest_name else item.new_file,
+            item.size,
+            item.mtime_ns,
+        )
+
+    def unpack(self, row: tuple) -> PlanItem:
+        """还原 pack 压缩的计划项"""
+        source_dir, relative_dir, file, dest_dir, dest_name, new_file, size, mtime_ns = row
+        return PlanItem(
+            os.path.join(self._dir_paths[source_dir], file),
+            os.path.join(self._dir_paths[relative_dir], file),
+            os.path.join(self._dir_paths[dest_dir], dest_name),
+            file,
+            dest_name if new_file is None else new_file,
+            size,
+            mtime_ns,
+        )
+
+    def _table(self, table: str) -> int:
+        table_id = self._tables.get(table)
+        if table_id is None:
+            table_id = self._tables[table] = len(self._tables)
+            self._data[table_id] = {}
+        return table_id
+
+    def get(self, table: str, group: int, key: str, default=None):
+        """
+        读取一个值
+
+        Args:
+            table: 表名
+            group: 分组（目录编号、文件大小等）
+            key: 键
+            default: 不存在时返回的值
+        """
+        table_id = self._table(table)
+        if self._db is None:
+            return self._data[table_id].get(group, {}).get(key, default)
+        row = self._db.execute(
+            "SELECT v FROM kv WHERE t = ? AND g = ? AND k = ?", (table_id, group, _key(key))
+        ).fetchone()
+        return default if row is None else marshal.loads(row[0])
+
+    def contains(self, table: str, group: int, key: str) -> bool:
+        return self.get(table, group, key, _MISSING) is not _MISSING
+
+    def put(self, table: str, group: int, key: str, value=None) -> None:
+        """写入一个值，已存在时覆盖；value 为 None 时相当于集合成员"""
+        table_id = self._table(table)
+        if self._db is None:
+            members = self._data[table_id].setdefault(group, {})
+            old = members.get(key, _MISSING)
+            members[key] = value
+            # 覆盖已有的键（如后缀计数）只按值的大小变化计算
+            if old is _MISSING:
+                self._grow(len(key) + _estimate(value) + _ENTRY_OVERHEAD)
+            else:
+                self._grow(_estimate(value) - _estimate(old))
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO kv (t, g, k, v) VALUES (?, ?, ?, ?)",
+            (table_id, group, _key(key), _encode(value)),
+        )
+        self._wrote(1)
+
+    def put_many(self, table: str, group: int, keys: Iterable[str]) -> None:
+        """把一批键作为集合成员写入同一分组"""
+        table_id = self._table(table)
+        if self._db is None:
+            members = self._data[table_id].setdefault(group, {})
+            size = 0
+            for key in keys:
+                if key not in members:
+                    members[key] = None
+                    size += len(key) + _ENTRY_OVERHEAD
+            self._grow(size)
+            return
+        none = _encode(None)
+        rows = [(table_id, group, _key(key), none) for key in keys]
+        self._db.executemany("INSERT OR REPLACE INTO kv (t, g, k, v) VALUES (?, ?, ?, ?)", rows)
+        self._wrote(len(rows))
+
+    def remove(self, table: str, group: int, key: str) -> None:
+        """删除一个值，不存在时忽略"""
+        table_id = self._table(table)
+        if self._db is None:
+            old = self._data[table_id].get(group, {}).pop(key, _MISSING)
+            if old is not _MISSING:
+                self._used -= len(key) + _estimate(old) + _ENTRY_OVERHEAD
+            return
+        self._db.execute(
+            "DELETE FROM kv WHERE t = ? AND g = ? AND k = ?", (table_id, group, _key(key))
+        )
+        self._wrote(1)
+
+    def append(self, *items: PlanItem) -> None:
+        """把一组计划项（如 重复文件, 第一份）压缩后放入队列"""
+        row = tuple(self.pack(item) for item in items)
+        if self._db is None:
+            self._queue.append(row)
+            self._grow(_estimate(row) + _ENTRY_OVERHEAD)
+            return
+        self._db.execute("INSERT INTO queue (row) VALUES (?)", (_encode(row),))
+        self._wrote(1)
+
+    def drain(self) -> Iterator[Tuple[PlanItem, ...]]:
+        """按放入顺序取出队列中的计划项，取出后队列清空"""
+        if self._db is None:
+            queue, self._queue = self._queue, []
+            for row in queue:
+                yield tuple(self.unpack(packed) for packed in row)
+            return
+
+        self._db.commit()
+        last = 0
+        while True:
+            rows = self._db.execute(
+                "SELECT seq, row FROM queue WHERE seq > ? ORDER BY seq LIMIT ?",
+                (last, _FETCH_SIZE),
+            ).fetchall()
+            if not rows:
+                break
+            last = rows[-1][0]
+            for _, data in rows:
+                yield tuple(self.unpack(packed) for packed in marshal.loads(data))
+        self._db.execute("DELETE FROM queue")
+
+    def _grow(self, size: int) -> None:
+        self._used += size
+        if self.memory_budget is not None and self._used > self.memory_budget:
+            self.spill()
+
+    def _wrote(self, count: int) -> None:
+        self._writes += count
+        if self._writes >= _COMMIT_EVERY:
+            self._db.commit()
+            self._writes = 0
+
+    def spill(self) -> None:
+        """把内存中的数据转存到临时 SQLite 文件，之后的读写都在磁盘上进行"""
+        if self._db is not None:
+            return
+
+        fd, self.path = tempfile.mkstemp(
+            prefix="renamefile_plan_", suffix=".sqlite", dir=self.spill_dir
+        )
+        os.close(fd)
+        # 只在本进程、本次运行中使用，不需要日志和刷盘
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode = OFF")
+        db.execute("PRAGMA synchronous = OFF")
+        db.execute(f"PRAGMA cache_size = -{_SQLITE_CACHE_KB}")
+        db.execute(
+            "CREATE TABLE kv (t INTEGER, g INTEGER, k BLOB, v BLOB, PRIMARY KEY (t, g, k))"
+            " WITHOUT ROWID"
+        )
+        db.execute("CREATE TABLE queue (seq INTEGER PRIMARY KEY, row BLOB)")
+
+        for table_id, groups in self._data.items():
+            for group, members in groups.items():
+                db.executemany(
+                    "INSERT INTO kv (t, g, k, v) VALUES (?, ?, ?, ?)",
+                    (
+                        (table_id, group, _key(key), _encode(value))
+                        for key, value in members.items()
+                    ),
+                )
+            groups.clear()
+        db.executemany(
+            "INSERT INTO queue (row) VALUES (?)", ((_encode(row),) for row in self._queue)
+        )
+        db.commit()
+
+        self._queue = []
+        self._used = 0
+        self._db = db
+        if self.on_spill is not None:
+            self.on_spill(self.path)
+
+    def close(self) -> None:
+        """清空所有数据，删除转存文件；之后可以重新使用"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+        self._dir_ids.clear()
+        self._dir_paths.clear()
+        for groups in self._data.values():
+            groups.clear()
+        self._queue = []
+        self._used = 0
+        self._writes = 0
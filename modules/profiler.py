@@ -0,0 +1,119 @@
+"""
+规则性能分析
+逐条执行规则，统计每条规则的执行次数、命中次数、改名次数和累计耗时
+"""
+
+import time
+from typing import Dict, List, Any
+from .types import Rule
+from .compiler import RuleCompiler
+
+
+class RuleProfile:
+    """单条规则的统计"""
+
+    __slots__ = ("index", "rule", "evaluations", "matches", "changed", "seconds")
+
+    def __init__(self, index: int, rule: Rule):
+        self.index = index
+        self.rule = rule
+        self.evaluations = 0
+        self.matches = 0
+        self.changed = 0
+        self.seconds = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "type": self.rule.rule_type,
+            "pattern": self.rule.pattern.pattern,
+            "evaluations": self.evaluations,
+            "matches": self.matches,
+            "changed": self.changed,
+            "seconds": self.seconds,
+        }
+
+
+class RuleProfiler:
+    """
+    规则性能分析器
+
+    规则逐条单独编译（不合并连续的替换规则），结果与正常执行完全一致，
+    但会比正常执行慢，只在需要排查时开启
+    """
+
+    def __init__(self, rules: List[Rule]):
+        """
+        Args:
+            rules: 已配置好的规则列表
+        """
+        self.profiles = [RuleProfile(i, rule) for i, rule in enumerate(rules)]
+        self._steps = [
+            (profile, profile.rule.pattern.search, RuleCompiler.compile_single(profile.rule))
+            for profile in self.profiles
+        ]
+
+    def apply(self, filename: str) -> str:
+        """依次执行规则并记录统计，返回新文件名"""
+        clock = time.perf_counter
+        for profile, search, func in self._steps:
+            start = clock()
+            new_filename = func(filename)
+            profile.seconds += clock() - start
+            profile.evaluations += 1
+
+            if new_filename != filename:
+                profile.matches += 1
+                profile.changed += 1
+            elif search(filename) is not None:
+                # 结果不变时再判断是否命中（例如替换成相同内容），这次判断不计入耗时
+                profile.matches += 1
+            filename = new_filename
+        return filename
+
+    def report(self, sort_by: str = "seconds") -> List[Dict[str, Any]]:
+        """
+        统计结果
+
+        Args:
+            sort_by: 排序字段，按该字段从大到小排列
+
+        Returns:
+            每条规则一项 {"index", "type", "pattern", "evaluations", "matches", "changed", "seconds"}
+        """
+        rows = [profile.as_dict() for profile in self.profiles]
+        rows.sort(key=lambda row: (-row[sort_by], row["index"]))
+        return rows
+
+    def format_report(self, limit: int = 20) -> List[str]:
+        """
+        格式化为文本行：耗时最多的前 limit 条规则，以及从未命中的规则
+
+        Args:
+            limit: 最多列出的规则条数，0 表示全部
+        """
+        rows = self.report()
+        total = sum(row["seconds"] for row in rows)
+        shown = rows[:limit] if limit else rows
+
+        lines = [
+            f"规则耗时统计（共 {len(rows)} 条，累计 {total * 1000:.1f} ms）",
+            f"{'#':>4} {'耗时(ms)':>10} {'占比':>6} {'执行':>8} {'命中':>8} {'改名':>8}  模式",
+        ]
+        for row in shown:
+            share = row["seconds"] / total if total else 0.0
+            lines.append(
+                f"{row['index'] + 1:>4} {row['seconds'] * 1000:>10.2f} {share:>6.1%} "
+                f"{row['evaluations']:>8} {row['matches']:>8} {row['changed']:>8}  "
+                f"{row['pattern']}"
+            )
+        if len(rows) > len(shown):
+            lines.append(f"  ……其余 {len(rows) - len(shown)} 条规则略")
+
+        dead = [row for row in rows if row["evaluations"] and not row["matches"]]
+        if dead:
+            dead.sort(key=lambda row: row["index"])
+            numbers = ", ".join(f"#{row['index'] + 1}" for row in dead[:50])
+            more = " ……" if len(dead) > 50 else ""
+            lines.append(f"从未命中的规则 {len(dead)} 条: {numbers}{more}")
+        return lines
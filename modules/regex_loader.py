@@ -5,26 +5,30 @@
 
 import os
 import re
-from typing import List
+from typing import List, Optional
 from .types import Rule
+from .literal import required_literal
+from .lint import DEFAULT_SLOW_SECONDS, lint_pattern, time_pattern
 
 
 class RegexRuleLoader:
     """正则表达式规则加载器"""
 
     @staticmethod
-    def load(script_dir: str) -> List[Rule]:
+    def load(script_dir: str, lint: bool = True, rules_file: Optional[str] = None) -> List[Rule]:
         """
         加载正则表达式规则（regex_rules.txt）
 
         Args:
             script_dir: 脚本所在目录
+            lint: 是否检查容易灾难性回溯的写法，并用极端文件名实测每条规则的耗时
+            rules_file: 规则文件路径，默认为脚本目录下的 regex_rules.txt
 
         Returns:
             规则列表
         """
         rules = []
-        rules_file = os.path.join(script_dir, "regex_rules.txt")
+        rules_file = rules_file or os.path.join(script_dir, "regex_rules.txt")
 
         try:
             with open(rules_file, "r", encoding="utf-8") as f:
@@ -61,6 +65,12 @@ class RegexRuleLoader:
                                 metadata = {"format_str": replacement}
 
                             rule = Rule(rule_type, pattern, replacement, metadata)
+
+                            # 必需字面量：文件名中没有它时跳过这条正则
+                            rule.metadata["literal"] = required_literal(pattern)
+
+                            if lint:
+                                RegexRuleLoader._lint(line_num, pattern)
                             rules.append(rule)
 
                         except re.error as e:
@@ -70,5 +80,18 @@ class RegexRuleLoader:
             return rules
 
         except FileNotFoundError:
-            print(f" 找不到 regex_rules.txt 文件")
+            print(f" 找不到 {os.path.basename(rules_file)} 文件")
             return []
+
+    @staticmethod
+    def _lint(line_num: int, pattern) -> None:
+        """打印规则的性能警告"""
+        for warning in lint_pattern(pattern):
+            print(f" 第 {line_num} 行规则 {pattern.pattern} 可能很慢: {warning}")
+
+        elapsed, name = time_pattern(pattern)
+        if elapsed > DEFAULT_SLOW_SECONDS:
+            print(
+                f" 第 {line_num} 行规则 {pattern.pattern} 处理长度 {len(name)} 的构造文件名"
+                f"耗时 {elapsed * 1000:.1f} ms，可能拖慢处理"
+            )
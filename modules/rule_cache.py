@@ -0,0 +1,132 @@
+"""
+规则缓存
+把解析好的正则规则和交互式配置的参数保存在规则文件旁，以规则文件内容的哈希为键；
+规则文件没有变化时直接读取，不再解析、检查和询问参数
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import List, Optional, Tuple
+from .types import Rule
+
+
+# 缓存格式版本，格式变化时旧缓存自动失效
+CACHE_VERSION = 1
+
+
+class RuleCache:
+    """规则缓存（JSON 旁路文件）"""
+
+    @staticmethod
+    def path_for(rules_file: str) -> str:
+        """规则文件对应的缓存文件路径，如 regex_rules.txt -> .regex_rules.cache.json"""
+        directory, name = os.path.split(rules_file)
+        stem = os.path.splitext(name)[0]
+        return os.path.join(directory, f".{stem}.cache.json")
+
+    @staticmethod
+    def file_hash(rules_file: str) -> Optional[str]:
+        """规则文件内容的哈希；文件不存在时返回 None"""
+        try:
+            with open(rules_file, "rb") as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    @staticmethod
+    def load(
+        rules_file: str, source_hash: Optional[str] = None
+    ) -> Optional[Tuple[List[Rule], bool]]:
+        """
+        读取缓存
+
+        Args:
+            rules_file: 规则文件路径
+            source_hash: 规则文件的哈希，None 时现场计算
+
+        Returns:
+            (规则列表, 是否已配置交互式参数)；缓存不存在、已过期或损坏时返回 None
+        """
+        if source_hash is None:
+            source_hash = RuleCache.file_hash(rules_file)
+        if source_hash is None:
+            return None
+
+        try:
+            with open(RuleCache.path_for(rules_file), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CACHE_VERSION or data.get("source_hash") != source_hash:
+                return None
+            rules = [
+                Rule(
+                    item["rule_type"],
+                    re.compile(item["pattern"], item["flags"]),
+                    item["replacement"],
+                    item["metadata"],
+                )
+                for item in data["rules"]
+            ]
+            return rules, bool(data.get("configured"))
+        except (OSError, ValueError, KeyError, TypeError, re.error):
+            return None
+
+    @staticmethod
+    def save(
+        rules_file: str, rules: List[Rule], configured: bool, source_hash: Optional[str] = None
+    ) -> bool:
+        """
+        写入缓存，先写临时文件再替换，中断时不会留下半个缓存
+
+        Args:
+            rules_file: 规则文件路径
+            rules: 规则列表
+            configured: 交互式参数是否已配置
+            source_hash: 解析规则时读到的规则文件哈希，None 时现场计算
+
+        Returns:
+            是否写入成功（目录只读等情况下不缓存）
+        """
+        if source_hash is None:
+            source_hash = RuleCache.file_hash(rules_file)
+        if source_hash is None:
+            return False
+
+        data = {
+            "version": CACHE_VERSION,
+            "source_hash": source_hash,
+            "configured": configured,
+            "rules": [
+                {
+                    "rule_type": rule.rule_type,
+                    "pattern": rule.pattern.pattern,
+                    "flags": rule.pattern.flags,
+                    "replacement": rule.replacement,
+                    "metadata": rule.metadata,
+                }
+                for rule in rules
+            ],
+        }
+
+        path = RuleCache.path_for(rules_file)
+        temp_path = path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+            return True
+        except (OSError, TypeError, ValueError):
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            return False
+
+    @staticmethod
+    def clear(rules_file: str) -> None:
+        """删除缓存，下次加载时重新解析并询问参数"""
+        try:
+            os.unlink(RuleCache.path_for(rules_file))
+        except FileNotFoundError:
+            pass
@@ -5,26 +5,28 @@
 
 import os
 import re
-from typing import List
-from .types import Rule
+from typing import List, Optional
+from .types import Rule, RuleSet
+from .matcher import MultiPatternMatcher
 
 
 class SimpleRuleLoader:
     """替换规则加载器"""
 
     @staticmethod
-    def load(script_dir: str) -> List[Rule]:
+    def load(script_dir: str, rules_file: Optional[str] = None) -> List[Rule]:
         """
         加载替换规则（words.txt）
 
         Args:
             script_dir: 脚本所在目录
+            rules_file: 规则文件路径，默认为脚本目录下的 words.txt
 
         Returns:
             规则列表
         """
         rules = []
-        rules_file = os.path.join(script_dir, "words.txt")
+        rules_file = rules_file or os.path.join(script_dir, "words.txt")
 
         try:
             with open(rules_file, "r", encoding="utf-8") as f:
@@ -36,12 +38,14 @@ class SimpleRuleLoader:
                         source, target = line.split("：", 1)
                         # 不区分大小写
                         pattern = re.compile(re.escape(source), re.IGNORECASE)
-                        rule = Rule("simple", pattern, target, None)
+                        rule = Rule("simple", pattern, target, {"source": source})
                         rules.append(rule)
 
             print(f" 加载了 {len(rules)} 条替换规则")
-            return rules
+
+            # 预构建多模式匹配器，每个文件名只需扫描一次
+            return RuleSet(rules, matcher=MultiPatternMatcher(rules))
 
         except FileNotFoundError:
-            print(f" 找不到 words.txt 文件")
+            print(f" 找不到 {os.path.basename(rules_file)} 文件")
             return []
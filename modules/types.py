@@ -2,6 +2,8 @@
 规则类型定义
 """
 
+import hashlib
+import json
 from typing import Pattern, Optional, Dict, Any
 
 
@@ -22,3 +24,42 @@ class Rule:
 
     def __repr__(self):
         return f"Rule(type={self.rule_type}, pattern={self.pattern.pattern})"
+
+
+class RuleSet(list):
+    """
+    规则列表
+
+    行为与 List[Rule] 一致，额外携带加载器预构建的加速结构
+    """
+
+    def __init__(self, rules=(), matcher=None):
+        super().__init__(rules)
+        self.matcher = matcher
+
+
+def rules_fingerprint(rules) -> str:
+    """
+    计算规则集合的指纹
+
+    规则类型、模式、标志、替换内容和配置参数任一变化，指纹都会变化
+
+    Args:
+        rules: 规则列表
+
+    Returns:
+        十六进制摘要
+    """
+    digest = hashlib.sha256()
+    for rule in rules:
+        spec = [
+            rule.rule_type,
+            rule.pattern.pattern,
+            rule.pattern.flags,
+            rule.replacement,
+            rule.metadata,
+        ]
+        encoded = json.dumps(spec, sort_keys=True, ensure_ascii=False, default=str)
+        digest.update(encoded.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
@@ -0,0 +1,147 @@
+"""
+目录遍历器
+基于 os.scandir 的流式遍历，逐个产出文件条目
+"""
+
+import os
+import threading
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+
+class FileEntry:
+    """遍历得到的文件条目"""
+
+    __slots__ = ("path", "rel_dir", "name", "size", "mtime_ns")
+
+    def __init__(self, path: str, rel_dir: str, name: str, size: int, mtime_ns: int):
+        """
+        Args:
+            path: 文件完整路径
+            rel_dir: 所在目录相对于遍历根目录的路径（根目录为空字符串）
+            name: 文件名（含扩展名）
+            size: 文件大小（字节）
+            mtime_ns: 修改时间（纳秒）
+        """
+        self.path = path
+        self.rel_dir = rel_dir
+        self.name = name
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    @property
+    def rel_path(self) -> str:
+        """相对于遍历根目录的路径"""
+        return os.path.join(self.rel_dir, self.name) if self.rel_dir else self.name
+
+    def __repr__(self):
+        return f"FileEntry({self.rel_path!r}, size={self.size})"
+
+
+def scan_tree(
+    root: str,
+    skip_dirs: Optional[Iterable[str]] = None,
+    file_filter=None,
+    on_filtered: Optional[Callable[[str], None]] = None,
+) -> Iterator[FileEntry]:
+    """
+    深度优先遍历目录，按名称排序产出文件
+
+    与 os.walk(followlinks=False) 的取舍一致：指向目录的符号链接不进入，
+    其余条目（包括指向文件的符号链接）都视为文件。
+    同一目录的文件连续产出，内存占用只与目录深度和单个目录的条目数有关
+
+    Args:
+        root: 遍历根目录
+        skip_dirs: 需要跳过的目录（绝对路径），例如位于源目录内部的输出目录
+        file_filter: FileFilter，被排除的目录不会进入，被排除的文件不会产出；
+            只按名称就能排除的文件不会 stat
+        on_filtered: 每排除一个文件调用 on_filtered("file")，每剪掉一个目录调用 on_filtered("dir")
+
+    Yields:
+        FileEntry
+    """
+    skip = {os.path.abspath(d) for d in skip_dirs or ()}
+    stack = [(root, "")]
+
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if is_dir:
+                if entry.is_symlink():
+                    continue
+                if skip and os.path.abspath(entry.path) in skip:
+                    continue
+                if file_filter is not None and file_filter.skip_dir(
+                    entry.name, os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                ):
+                    if on_filtered is not None:
+                        on_filtered("dir")
+                    continue
+                subdirs.append(entry)
+                continue
+
+            if file_filter is not None and not file_filter.accepts_name(
+                entry.name, os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            ):
+                if on_filtered is not None:
+                    on_filtered("file")
+                continue
+
+            try:
+                st = entry.stat()
+                size, mtime_ns = st.st_size, st.st_mtime_ns
+            except OSError:
+                # 失效的符号链接等，交给后续阶段报错
+                size, mtime_ns = 0, 0
+
+            if file_filter is not None and not file_filter.accepts_size(size):
+                if on_filtered is not None:
+                    on_filtered("file")
+                continue
+
+            yield FileEntry(entry.path, rel_dir, entry.name, size, mtime_ns)
+
+        # 逆序入栈，保证子目录按名称顺序出栈
+        for entry in reversed(subdirs):
+            sub_rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            stack.append((entry.path, sub_rel))
+
+
+def count_tree(
+    root: str,
+    skip_dirs: Optional[Iterable[str]] = None,
+    stop: Optional[threading.Event] = None,
+    file_filter=None,
+) -> Tuple[int, int]:
+    """
+    预先统计文件数和总字节数，用于显示进度
+
+    Args:
+        root: 遍历根目录
+        skip_dirs: 需要跳过的目录
+        stop: 设置后提前结束统计
+        file_filter: FileFilter，只统计通过过滤的文件
+
+    Returns:
+        (文件数, 总字节数)
+    """
+    files = 0
+    total_bytes = 0
+    for entry in scan_tree(root, skip_dirs, file_filter):
+        if stop is not None and stop.is_set():
+            break
+        files += 1
+        total_bytes += entry.size
+    return files, total_bytes
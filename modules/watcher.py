@@ -0,0 +1,370 @@
+"""
+目录监视
+发现新出现或被修改的文件：Linux 上用 inotify（通过 ctypes 调用，无需第三方库），
+其他平台或 inotify 不可用时定期重新遍历目录比较
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import stat
+import struct
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .walker import scan_tree
+
+
+# inotify 事件掩码（linux/inotify.h）
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+    | _IN_ONLYDIR
+    | _IN_DONT_FOLLOW
+)
+
+# struct inotify_event 的固定部分：wd, mask, cookie, len
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """
+    基于 inotify 的监视器
+
+    为根目录及其所有子目录各注册一个监视，新建的子目录会自动加入；
+    没有文件变化时不消耗 CPU
+    """
+
+    def __init__(self, root: str, skip_dirs: Optional[Iterable[str]] = None, file_filter=None):
+        """
+        Args:
+            root: 监视的根目录
+            skip_dirs: 不监视的目录（绝对路径），例如位于源目录内部的输出目录
+            file_filter: FileFilter，被排除的目录不注册监视，重新遍历时也不进入
+
+        Raises:
+            OSError: 当前系统不支持 inotify，或监视数量超过系统上限
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify 只在 Linux 上可用")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "libc 不支持 inotify")
+
+        self.root = os.path.abspath(root)
+        self._skip = {os.path.abspath(d) for d in skip_dirs or ()}
+        self._filter = file_filter
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        # 监视描述符 -> 目录路径
+        self._dirs: Dict[int, str] = {}
+
+        try:
+            self._add_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            # 目录在注册前被删除，或不是目录
+            if code in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(code, f"{os.strerror(code)}: {path}")
+        self._dirs[wd] = path
+
+    def _excluded(self, path: str) -> bool:
+        if path in self._skip:
+            return True
+        if self._filter is None or path == self.root:
+            return False
+        return self._filter.skip_dir(os.path.basename(path), os.path.relpath(path, self.root))
+
+    def _add_tree(self, top: str) -> None:
+        """监视 top 及其下所有子目录（不进入指向目录的符号链接）"""
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            if self._excluded(path):
+                continue
+            self._add_watch(path)
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                        except OSError:
+                            pass
+            except OSError:
+                pass
+
+    def _files_under(self, top: str) -> List[str]:
+        return [
+            entry.path
+            for entry in scan_tree(top, skip_dirs=self._skip, file_filter=self._dir_filter())
+        ]
+
+    def _dir_filter(self):
+        """只剪掉被排除的目录，文件是否处理由调用方决定"""
+        if self._filter is None:
+            return None
+        return _DirectoryFilter(self._filter)
+
+    def poll(self, timeout: float) -> List[str]:
+        """
+        等待文件变化
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            发生变化的文件路径（可能重复，可能已被删除）
+        """
+        ready, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not ready:
+            return []
+
+        changed: List[str] = []
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            self._parse(data, changed)
+        return changed
+
+    def _parse(self, data: bytes, changed: List[str]) -> None:
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                # 事件队列溢出，丢失的变化只能靠重新遍历找回
+                changed.extend(self._files_under(self.root))
+                continue
+
+            if mask & _IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+
+            directory = self._dirs.get(wd)
+            if mask & _IN_MOVE_SELF and directory is not None:
+                # 移到监视范围内时已经以新路径重新注册（同一目录的监视描述符不变）
+                if not os.path.isdir(directory):
+                    self._libc.inotify_rm_watch(self._fd, wd)
+                    self._dirs.pop(wd, None)
+                continue
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO) and not self._excluded(path):
+                    # 新目录在注册监视之前可能已经写入了文件
+                    self._add_tree(path)
+                    changed.extend(self._files_under(path))
+                continue
+
+            if mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_MODIFY):
+                changed.append(path)
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    """
+    轮询监视器
+
+    每隔 interval 秒重新遍历一次目录，与上次的大小、修改时间比较；
+    开销与目录规模成正比，只在 inotify 不可用时使用
+    """
+
+    def __init__(
+        self,
+        root: str,
+        skip_dirs: Optional[Iterable[str]] = None,
+        interval: float = 2.0,
+        file_filter=None,
+    ):
+        """
+        Args:
+            root: 监视的根目录
+            skip_dirs: 不监视的目录（绝对路径）
+            interval: 两次遍历的间隔（秒）
+            file_filter: FileFilter，被排除的目录不再遍历
+        """
+        self.root = os.path.abspath(root)
+        self.interval = interval
+        self._skip = [os.path.abspath(d) for d in skip_dirs or ()]
+        self._filter = None if file_filter is None else _DirectoryFilter(file_filter)
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        return {
+            entry.path: (entry.size, entry.mtime_ns)
+            for entry in scan_tree(self.root, skip_dirs=self._skip, file_filter=self._filter)
+        }
+
+    def poll(self, timeout: float) -> List[str]:
+        """等待文件变化，参数和返回值见 InotifyWatcher.poll"""
+        remaining = self._next_scan - time.monotonic()
+        if remaining > 0:
+            time.sleep(min(remaining, max(timeout, 0)))
+            if time.monotonic() < self._next_scan:
+                return []
+
+        snapshot = self._scan()
+        self._next_scan = time.monotonic() + self.interval
+        changed = [
+            path for path, state in snapshot.items() if self._snapshot.get(path) != state
+        ]
+        self._snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        self._snapshot = {}
+
+
+def create_watcher(
+    root: str,
+    skip_dirs: Optional[Iterable[str]] = None,
+    interval: float = 2.0,
+    backend: str = "auto",
+    file_filter=None,
+):
+    """
+    创建监视器
+
+    Args:
+        root: 监视的根目录
+        skip_dirs: 不监视的目录
+        interval: 轮询间隔（秒），只对轮询监视器有效
+        backend: auto（优先 inotify）/ inotify / polling
+        file_filter: FileFilter，被排除的目录不监视
+
+    Returns:
+        InotifyWatcher 或 PollingWatcher
+    """
+    if backend in ("auto", "inotify"):
+        try:
+            return InotifyWatcher(root, skip_dirs, file_filter)
+        except OSError:
+            if backend == "inotify":
+                raise
+    return PollingWatcher(root, skip_dirs, interval, file_filter)
+
+
+class _DirectoryFilter:
+    """只使用 FileFilter 的目录排除，所有文件都放行"""
+
+    def __init__(self, file_filter):
+        self.skip_dir = file_filter.skip_dir
+
+    @staticmethod
+    def accepts_name(name: str, rel_path: str) -> bool:
+        return True
+
+    @staticmethod
+    def accepts_size(size: int) -> bool:
+        return True
+
+
+class Debouncer:
+    """
+    防抖：文件在 settle 秒内没有新的事件，且大小和修改时间不再变化时才视为写完
+    """
+
+    def __init__(self, settle: float = 2.0):
+        """
+        Args:
+            settle: 静默时间（秒）
+        """
+        self.settle = settle
+        # 路径 -> (截止时间, 大小, 修改时间)
+        self._pending: Dict[str, Tuple[float, int, int]] = {}
+
+    def __len__(self):
+        return len(self._pending)
+
+    @staticmethod
+    def _state(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def touch(self, paths: Iterable[str]) -> None:
+        """记录发生变化的文件，重新开始计时"""
+        deadline = time.monotonic() + self.settle
+        for path in set(paths):
+            state = self._state(path)
+            if state is None:
+                self._pending.pop(path, None)
+            else:
+                self._pending[path] = (deadline, *state)
+
+    def next_deadline(self) -> Optional[float]:
+        """最早的截止时间，没有待定文件时返回 None"""
+        if not self._pending:
+            return None
+        return min(deadline for deadline, _, _ in self._pending.values())
+
+    def ready(self) -> List[str]:
+        """
+        取出已经写完的文件
+
+        到期时再检查一次大小和修改时间，仍在变化的文件重新计时，已消失的文件丢弃
+        """
+        now = time.monotonic()
+        done: List[str] = []
+        expired: Set[str] = {
+            path for path, (deadline, _, _) in self._pending.items() if deadline <= now
+        }
+        for path in expired:
+            _, size, mtime_ns = self._pending.pop(path)
+            state = self._state(path)
+            if state is None:
+                continue
+            if state == (size, mtime_ns):
+                done.append(path)
+            else:
+                self._pending[path] = (now + self.settle, *state)
+        return sorted(done)